@@ -1,7 +1,109 @@
+import functools
+import heapq
+import inspect
 import itertools
+import weakref
+
+# Truth-table evaluation: models per 64-bit word, as a power of two, and
+# the word holding symbol i's value in each model when it varies fastest
+WORD_BITS = 6
+ALL_ONES = (1 << 64) - 1
+WORD_PATTERNS = [
+    sum(1 << bit for bit in range(64) if bit >> i & 1)
+    for i in range(WORD_BITS)
+]
+BLOCK_BITS = 20
+
+# Answers of model_check_many
+ENTAILED = "entailed"
+REFUTED = "refuted"
+UNKNOWN = "unknown"
+
+# Interned sentences by class and constructor arguments, while interning
+# is on; see intern_sentences
+interning = False
+interned_sentences = weakref.WeakValueDictionary()
+
+
+def intern_sentences(enabled=True):
+    """
+    Turns interning of new sentences on or off. While it is on,
+    constructing a sentence structurally equal to a live interned one
+    returns that one, and interned sentences, which cannot be changed,
+    compute their hash, symbols and formula only once.
+    """
+    global interning
+    interning = enabled
+
+
+class Interning(type):
+    """Metaclass of sentences that returns shared interned instances."""
+
+    def __call__(cls, *args, **kwargs):
+        # A sentence made with no arguments, like And(), is usually an
+        # accumulator filled in with add, so it is never interned
+        if not interning or not (args or kwargs):
+            return super().__call__(*args, **kwargs)
+        try:
+            # Key keyword arguments by position, so that Symbol("A") and
+            # Symbol(name="A") are the same sentence
+            if kwargs:
+                bound = constructor_signature(cls).bind(None, *args, **kwargs)
+                args = bound.args[1:]
+                kwargs = {}
+            key = (cls, args)
+            sentence = interned_sentences.get(key)
+        except TypeError:
+            # Bad or unhashable arguments: let the constructor reject them
+            return super().__call__(*args, **kwargs)
+        if sentence is None:
+            sentence = super().__call__(*args)
+            sentence.interned = True
+            sentence.cache = {}
+            interned_sentences[key] = sentence
+        return sentence
+
+
+@functools.lru_cache(maxsize=None)
+def constructor_signature(cls):
+    """Returns the signature of a sentence class's __init__."""
+    return inspect.signature(cls.__init__)
+
+
+def cached(method):
+    """Caches the result of a method of an interned sentence."""
+    name = method.__name__
+
+    @functools.wraps(method)
+    def wrapper(self):
+        if not self.interned:
+            return method(self)
+        try:
+            value = self.cache[name]
+        except KeyError:
+            value = self.cache[name] = method(self)
+        # Callers may change the sets they are given
+        return value.copy() if isinstance(value, set) else value
+    return wrapper
 
 
-class Sentence():
+def interned_eq(method):
+    """Compares interned sentences by identity."""
+
+    @functools.wraps(method)
+    def wrapper(self, other):
+        if self is other:
+            return True
+        if self.interned and getattr(other, "interned", False):
+            return False
+        return method(self, other)
+    return wrapper
+
+
+class Sentence(metaclass=Interning):
+
+    # Set on sentences made while interning is on
+    interned = False
 
     def evaluate(self, model):
         """Evaluates the logical sentence."""
@@ -15,6 +117,39 @@ class Sentence():
         """Returns a set of all symbols in the logical sentence."""
         return set()
 
+    def expression(self, index):
+        """
+        Returns a Python expression for the sentence over a tuple `m` of
+        truth values, where symbol `name` is `m[index[name]]`.
+        """
+        raise Exception("nothing to compile")
+
+    def bits(self, columns, memo):
+        """
+        Returns a NumPy array of 64-bit words holding the sentence's truth
+        value in a block of models, one model per bit, where symbol `name`
+        is `columns[name]`. `memo` maps ids of sentences already
+        evaluated in the block to their words, and "true" and "false" to
+        words of all ones and all zeros.
+        """
+        raise Exception("nothing to evaluate")
+
+    def compile(self, symbols=None):
+        """
+        Returns a function evaluating the sentence on a tuple of truth
+        values, one for each name in `symbols` (by default the sentence's
+        own symbols, sorted), so a model needs no dict lookups.
+        """
+        if symbols is None:
+            symbols = sorted(self.symbols())
+        index = {name: i for i, name in enumerate(symbols)}
+        try:
+            return compile_expression(self.expression(index))
+        except (SyntaxError, RecursionError, MemoryError):
+            # Too deeply nested for the parser: evaluate the tree instead
+            names = list(symbols)
+            return lambda m: self.evaluate(dict(zip(names, m)))
+
     @classmethod
     def validate(cls, sentence):
         if not isinstance(sentence, Sentence):
@@ -47,6 +182,7 @@ class Symbol(Sentence):
     def __init__(self, name):
         self.name = name
 
+    @interned_eq
     def __eq__(self, other):
         return isinstance(other, Symbol) and self.name == other.name
 
@@ -68,15 +204,29 @@ class Symbol(Sentence):
     def symbols(self):
         return {self.name}
 
+    def expression(self, index):
+        try:
+            return f"m[{index[self.name]}]"
+        except KeyError:
+            raise Exception(f"variable {self.name} not in model")
+
+    def bits(self, columns, memo):
+        try:
+            return columns[self.name]
+        except KeyError:
+            raise Exception(f"variable {self.name} not in model")
+
 
 class Not(Sentence):
     def __init__(self, operand):
         Sentence.validate(operand)
         self.operand = operand
 
+    @interned_eq
     def __eq__(self, other):
         return isinstance(other, Not) and self.operand == other.operand
 
+    @cached
     def __hash__(self):
         return hash(("not", hash(self.operand)))
 
@@ -86,12 +236,20 @@ class Not(Sentence):
     def evaluate(self, model):
         return not self.operand.evaluate(model)
 
+    @cached
     def formula(self):
         return "¬" + Sentence.parenthesize(self.operand.formula())
 
+    @cached
     def symbols(self):
         return self.operand.symbols()
 
+    def expression(self, index):
+        return f"(not {self.operand.expression(index)})"
+
+    def bits(self, columns, memo):
+        return ~self.operand.bits(columns, memo)
+
 
 class And(Sentence):
     def __init__(self, *conjuncts):
@@ -99,9 +257,11 @@ class And(Sentence):
             Sentence.validate(conjunct)
         self.conjuncts = list(conjuncts)
 
+    @interned_eq
     def __eq__(self, other):
         return isinstance(other, And) and self.conjuncts == other.conjuncts
 
+    @cached
     def __hash__(self):
         return hash(
             ("and", tuple(hash(conjunct) for conjunct in self.conjuncts))
@@ -114,21 +274,41 @@ class And(Sentence):
         return f"And({conjunctions})"
 
     def add(self, conjunct):
+        if self.interned:
+            raise Exception("cannot add to an interned sentence")
         Sentence.validate(conjunct)
         self.conjuncts.append(conjunct)
 
     def evaluate(self, model):
         return all(conjunct.evaluate(model) for conjunct in self.conjuncts)
 
+    @cached
     def formula(self):
         if len(self.conjuncts) == 1:
             return self.conjuncts[0].formula()
         return " ∧ ".join([Sentence.parenthesize(conjunct.formula())
                            for conjunct in self.conjuncts])
 
+    @cached
     def symbols(self):
         return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
 
+    def expression(self, index):
+        if not self.conjuncts:
+            return "True"
+        return "(" + " and ".join(
+            [conjunct.expression(index) for conjunct in self.conjuncts]
+        ) + ")"
+
+    def bits(self, columns, memo):
+        key = id(self)
+        if key not in memo:
+            words = memo["true"]
+            for conjunct in self.conjuncts:
+                words = words & conjunct.bits(columns, memo)
+            memo[key] = words
+        return memo[key]
+
 
 class Or(Sentence):
     def __init__(self, *disjuncts):
@@ -136,9 +316,11 @@ class Or(Sentence):
             Sentence.validate(disjunct)
         self.disjuncts = list(disjuncts)
 
+    @interned_eq
     def __eq__(self, other):
         return isinstance(other, Or) and self.disjuncts == other.disjuncts
 
+    @cached
     def __hash__(self):
         return hash(
             ("or", tuple(hash(disjunct) for disjunct in self.disjuncts))
@@ -151,15 +333,33 @@ class Or(Sentence):
     def evaluate(self, model):
         return any(disjunct.evaluate(model) for disjunct in self.disjuncts)
 
+    @cached
     def formula(self):
         if len(self.disjuncts) == 1:
             return self.disjuncts[0].formula()
         return " ∨  ".join([Sentence.parenthesize(disjunct.formula())
                             for disjunct in self.disjuncts])
 
+    @cached
     def symbols(self):
         return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
 
+    def expression(self, index):
+        if not self.disjuncts:
+            return "False"
+        return "(" + " or ".join(
+            [disjunct.expression(index) for disjunct in self.disjuncts]
+        ) + ")"
+
+    def bits(self, columns, memo):
+        key = id(self)
+        if key not in memo:
+            words = memo["false"]
+            for disjunct in self.disjuncts:
+                words = words | disjunct.bits(columns, memo)
+            memo[key] = words
+        return memo[key]
+
 
 class Implication(Sentence):
     def __init__(self, antecedent, consequent):
@@ -168,11 +368,13 @@ class Implication(Sentence):
         self.antecedent = antecedent
         self.consequent = consequent
 
+    @interned_eq
     def __eq__(self, other):
         return (isinstance(other, Implication)
                 and self.antecedent == other.antecedent
                 and self.consequent == other.consequent)
 
+    @cached
     def __hash__(self):
         return hash(("implies", hash(self.antecedent), hash(self.consequent)))
 
@@ -183,14 +385,28 @@ class Implication(Sentence):
         return ((not self.antecedent.evaluate(model))
                 or self.consequent.evaluate(model))
 
+    @cached
     def formula(self):
         antecedent = Sentence.parenthesize(self.antecedent.formula())
         consequent = Sentence.parenthesize(self.consequent.formula())
         return f"{antecedent} => {consequent}"
 
+    @cached
     def symbols(self):
         return set.union(self.antecedent.symbols(), self.consequent.symbols())
 
+    def expression(self, index):
+        antecedent = self.antecedent.expression(index)
+        consequent = self.consequent.expression(index)
+        return f"(not {antecedent} or {consequent})"
+
+    def bits(self, columns, memo):
+        key = id(self)
+        if key not in memo:
+            memo[key] = (~self.antecedent.bits(columns, memo)
+                         | self.consequent.bits(columns, memo))
+        return memo[key]
+
 
 class Biconditional(Sentence):
     def __init__(self, left, right):
@@ -199,11 +415,13 @@ class Biconditional(Sentence):
         self.left = left
         self.right = right
 
+    @interned_eq
     def __eq__(self, other):
         return (isinstance(other, Biconditional)
                 and self.left == other.left
                 and self.right == other.right)
 
+    @cached
     def __hash__(self):
         return hash(("biconditional", hash(self.left), hash(self.right)))
 
@@ -211,53 +429,497 @@ class Biconditional(Sentence):
         return f"Biconditional({self.left}, {self.right})"
 
     def evaluate(self, model):
-        return ((self.left.evaluate(model)
-                 and self.right.evaluate(model))
-                or (not self.left.evaluate(model)
-                    and not self.right.evaluate(model)))
+        return self.left.evaluate(model) == self.right.evaluate(model)
 
+    @cached
     def formula(self):
         left = Sentence.parenthesize(str(self.left))
         right = Sentence.parenthesize(str(self.right))
         return f"{left} <=> {right}"
 
+    @cached
     def symbols(self):
         return set.union(self.left.symbols(), self.right.symbols())
 
-
-def model_check(knowledge, query):
-    """Checks if knowledge base entails query."""
-
-    def check_all(knowledge, query, symbols, model):
-        """Checks if knowledge base entails query, given a particular model."""
-
-        # If model has an assignment for each symbol
-        if not symbols:
-
-            # If knowledge base is true in model, then query must also be true
-            if knowledge.evaluate(model):
-                return query.evaluate(model)
-            return True
+    def expression(self, index):
+        left = self.left.expression(index)
+        right = self.right.expression(index)
+        return f"({left} == {right})"
+
+    def bits(self, columns, memo):
+        key = id(self)
+        if key not in memo:
+            memo[key] = ~(self.left.bits(columns, memo)
+                          ^ self.right.bits(columns, memo))
+        return memo[key]
+
+
+class CNF():
+    """
+    Clauses in conjunctive normal form, built from sentences by Tseitin
+    encoding: each compound sentence gets a new variable defined to be
+    equivalent to it, so the clauses grow linearly with the sentence.
+
+    Variables are positive integers and a literal is a variable or its
+    negation. Symbol `name` is variable `variables[name]`.
+    """
+
+    def __init__(self):
+        self.variables = {}
+        self.clauses = []
+        self.count = 0
+        # Literals already made for compound sentences, by sentence id
+        self.literals = {}
+        self.true = None
+
+    def variable(self):
+        """Returns a new variable."""
+        self.count += 1
+        return self.count
+
+    def add(self, sentence):
+        """Adds clauses asserting that `sentence` holds."""
+        Sentence.validate(sentence)
+        if isinstance(sentence, And):
+            for conjunct in sentence.conjuncts:
+                self.add(conjunct)
+        elif isinstance(sentence, Or):
+            self.clauses.append(
+                [self.literal(disjunct) for disjunct in sentence.disjuncts]
+            )
+        elif isinstance(sentence, Implication):
+            self.clauses.append([-self.literal(sentence.antecedent),
+                                 self.literal(sentence.consequent)])
         else:
-
-            # Choose one of the remaining unused symbols
-            remaining = symbols.copy()
-            p = remaining.pop()
-
-            # Create a model where the symbol is true
-            model_true = model.copy()
-            model_true[p] = True
-
-            # Create a model where the symbol is false
-            model_false = model.copy()
-            model_false[p] = False
-
-            # Ensure entailment holds in both models
-            return (check_all(knowledge, query, remaining, model_true) and
-                    check_all(knowledge, query, remaining, model_false))
+            self.clauses.append([self.literal(sentence)])
+
+    def literal(self, sentence):
+        """Returns a literal equivalent to `sentence`."""
+        if isinstance(sentence, Symbol):
+            if sentence.name not in self.variables:
+                self.variables[sentence.name] = self.variable()
+            return self.variables[sentence.name]
+        if isinstance(sentence, Not):
+            return -self.literal(sentence.operand)
+        key = id(sentence)
+        if key in self.literals:
+            return self.literals[key][0]
+
+        if isinstance(sentence, Biconditional):
+            left = self.literal(sentence.left)
+            right = self.literal(sentence.right)
+            v = self.variable()
+            self.clauses.extend([[-v, -left, right], [-v, left, -right],
+                                 [v, left, right], [v, -left, -right]])
+        else:
+            if isinstance(sentence, And):
+                operands = [self.literal(c) for c in sentence.conjuncts]
+                sign = 1
+            elif isinstance(sentence, Or):
+                operands = [self.literal(d) for d in sentence.disjuncts]
+                sign = -1
+            elif isinstance(sentence, Implication):
+                operands = [-self.literal(sentence.antecedent),
+                            self.literal(sentence.consequent)]
+                sign = -1
+            else:
+                raise TypeError("must be a logical sentence")
+            if not operands:
+                v = sign * self.constant()
+            elif len(operands) == 1:
+                v = operands[0]
+            else:
+                # v <=> (a1 and ... and ak), where an Or is the negation of
+                # an And of negated operands
+                conjuncts = [sign * operand for operand in operands]
+                v = self.variable()
+                self.clauses.extend([[-v, c] for c in conjuncts])
+                self.clauses.append([v] + [-c for c in conjuncts])
+                v *= sign
+
+        # Keep the sentence alive so that its id is not reused
+        self.literals[key] = (v, sentence)
+        return v
+
+    def constant(self):
+        """Returns a variable that is always true."""
+        if self.true is None:
+            self.true = self.variable()
+            self.clauses.append([self.true])
+        return self.true
+
+
+class Solver():
+    """
+    CDCL SAT solver: unit propagation over two watched literals per
+    clause, conflict analysis learning a first-UIP clause and jumping back
+    to the level it asserts, VSIDS decisions with phase saving, and
+    restarts.
+    """
+
+    RESTART_FIRST = 100
+    RESTART_GROWTH = 1.5
+    ACTIVITY_DECAY = 0.95
+
+    def __init__(self, count, clauses):
+        self.count = count
+        self.clauses = []
+        self.watches = {}
+        self.values = [None] * (count + 1)
+        self.levels = [0] * (count + 1)
+        self.reasons = [None] * (count + 1)
+        self.phases = [False] * (count + 1)
+        self.activity = [0.0] * (count + 1)
+        self.increment = 1.0
+        self.heap = [(0.0, v) for v in range(1, count + 1)]
+        self.trail = []
+        self.trail_limits = []
+        self.head = 0
+        self.conflict = False
+        for clause in clauses:
+            self.add_clause(clause)
+
+    def add_clause(self, literals):
+        """Adds a clause before solving starts."""
+        clause = list(dict.fromkeys(literals))
+        if any(-literal in clause for literal in clause):
+            return
+        if not clause:
+            self.conflict = True
+        elif len(clause) == 1:
+            value = self.value(clause[0])
+            if value is False:
+                self.conflict = True
+            elif value is None:
+                self.assign(clause[0], None)
+        else:
+            self.watch(clause)
+
+    def watch(self, clause):
+        """Stores a clause, watching its first two literals."""
+        index = len(self.clauses)
+        self.clauses.append(clause)
+        self.watches.setdefault(clause[0], []).append(index)
+        self.watches.setdefault(clause[1], []).append(index)
+        return index
+
+    def value(self, literal):
+        value = self.values[abs(literal)]
+        if value is None or literal > 0:
+            return value
+        return not value
+
+    def assign(self, literal, reason):
+        variable = abs(literal)
+        self.values[variable] = literal > 0
+        self.levels[variable] = len(self.trail_limits)
+        self.reasons[variable] = reason
+        self.trail.append(literal)
+
+    def propagate(self):
+        """
+        Assigns every literal forced by unit clauses, and returns the
+        index of a clause left false, or None if there is none.
+        """
+        clauses = self.clauses
+        value = self.value
+        while self.head < len(self.trail):
+            false_literal = -self.trail[self.head]
+            self.head += 1
+            watching = self.watches.get(false_literal, [])
+            i = 0
+            while i < len(watching):
+                index = watching[i]
+                clause = clauses[index]
+                if clause[0] == false_literal:
+                    clause[0], clause[1] = clause[1], clause[0]
+                if value(clause[0]) is True:
+                    i += 1
+                    continue
+                for k in range(2, len(clause)):
+                    if value(clause[k]) is not False:
+                        # Watch another literal instead
+                        clause[1], clause[k] = clause[k], clause[1]
+                        self.watches.setdefault(clause[1], []).append(index)
+                        watching[i] = watching[-1]
+                        watching.pop()
+                        break
+                else:
+                    if value(clause[0]) is False:
+                        return index
+                    self.assign(clause[0], index)
+                    i += 1
+        return None
+
+    def analyze(self, conflict):
+        """
+        Returns the first-UIP clause learned from a conflicting clause,
+        asserting literal first, and the level to jump back to.
+        """
+        level = len(self.trail_limits)
+        learned = []
+        seen = set()
+        pending = 0
+        literal = None
+        clause = self.clauses[conflict]
+        index = len(self.trail) - 1
+        while True:
+            for q in clause:
+                variable = abs(q)
+                if q == literal or variable in seen:
+                    continue
+                if self.levels[variable] > 0:
+                    seen.add(variable)
+                    self.bump(variable)
+                    if self.levels[variable] == level:
+                        pending += 1
+                    else:
+                        learned.append(q)
+            # Resolve on the most recent assignment in the clause
+            while abs(self.trail[index]) not in seen:
+                index -= 1
+            literal = self.trail[index]
+            index -= 1
+            pending -= 1
+            if pending == 0:
+                break
+            clause = self.clauses[self.reasons[abs(literal)]]
+
+        learned.insert(0, -literal)
+        if len(learned) == 1:
+            return learned, 0
+        # Watch the literal from the highest remaining level second
+        top = max(range(1, len(learned)),
+                  key=lambda i: self.levels[abs(learned[i])])
+        learned[1], learned[top] = learned[top], learned[1]
+        return learned, self.levels[abs(learned[1])]
+
+    def bump(self, variable):
+        self.activity[variable] += self.increment
+        if self.activity[variable] > 1e100:
+            self.activity = [a * 1e-100 for a in self.activity]
+            self.increment *= 1e-100
+            self.heap = [(-self.activity[v], v)
+                         for v in range(1, self.count + 1)]
+            heapq.heapify(self.heap)
+        else:
+            heapq.heappush(self.heap, (-self.activity[variable], variable))
+
+    def backjump(self, level):
+        """Undoes every assignment made after decision level `level`."""
+        if len(self.trail_limits) <= level:
+            return
+        start = self.trail_limits[level]
+        for literal in self.trail[start:]:
+            variable = abs(literal)
+            self.phases[variable] = literal > 0
+            self.values[variable] = None
+            self.reasons[variable] = None
+            heapq.heappush(self.heap, (-self.activity[variable], variable))
+        del self.trail[start:]
+        del self.trail_limits[level:]
+        self.head = len(self.trail)
+
+    def decide(self):
+        """Returns the unassigned variable with the highest activity."""
+        while self.heap:
+            _, variable = heapq.heappop(self.heap)
+            if self.values[variable] is None:
+                return variable
+        for variable in range(1, self.count + 1):
+            if self.values[variable] is None:
+                return variable
+        return None
+
+    def solve(self):
+        """
+        Returns a satisfying assignment as a list indexed by variable, or
+        None if the clauses are unsatisfiable.
+        """
+        if self.conflict or self.propagate() is not None:
+            return None
+        conflicts = 0
+        restart_limit = self.RESTART_FIRST
+        while True:
+            conflict = self.propagate()
+            if conflict is not None:
+                if not self.trail_limits:
+                    return None
+                learned, level = self.analyze(conflict)
+                self.backjump(level)
+                if len(learned) == 1:
+                    self.assign(learned[0], None)
+                else:
+                    self.assign(learned[0], self.watch(learned))
+                self.increment /= self.ACTIVITY_DECAY
+                conflicts += 1
+                if conflicts >= restart_limit:
+                    conflicts = 0
+                    restart_limit *= self.RESTART_GROWTH
+                    self.backjump(0)
+                continue
+            variable = self.decide()
+            if variable is None:
+                return list(self.values)
+            self.trail_limits.append(len(self.trail))
+            self.assign(variable if self.phases[variable] else -variable,
+                        None)
+
+
+def sat_entails(knowledge, query):
+    """Checks if knowledge base entails query with a SAT solver."""
+    cnf = CNF()
+    cnf.add(knowledge)
+    cnf.add(Not(query))
+    return Solver(cnf.count, cnf.clauses).solve() is None
+
+
+def truth_table_entails(knowledge, query, block_bits=BLOCK_BITS):
+    """
+    Checks if knowledge base entails query by evaluating both on every
+    model at once, 64 models to a word, in blocks of 2^block_bits models.
+    """
+    symbols = sorted(set.union(knowledge.symbols(), query.symbols()))
+    for columns, memo, valid in truth_table_blocks(symbols, block_bits):
+        counterexamples = (knowledge.bits(columns, memo)
+                           & ~query.bits(columns, memo) & valid)
+        if counterexamples.any():
+            return False
+    return True
+
+
+def truth_table_blocks(symbols, block_bits=BLOCK_BITS):
+    """
+    Yields (columns, memo, valid) for each block of models over `symbols`
+    to pass to Sentence.bits, where `valid` marks the bits that are
+    models.
+    """
+    import numpy as np
+
+    # Symbols below `inner` vary within a block, the rest between blocks
+    inner = max(min(len(symbols), block_bits), WORD_BITS)
+    words = 1 << (inner - WORD_BITS)
+    ones = np.full(words, ALL_ONES, dtype=np.uint64)
+    zeros = np.zeros(words, dtype=np.uint64)
+    index = np.arange(words)
+    columns = {}
+    for i, name in enumerate(symbols[:inner]):
+        if i < WORD_BITS:
+            columns[name] = np.full(words, WORD_PATTERNS[i], dtype=np.uint64)
+        else:
+            columns[name] = np.where(index >> (i - WORD_BITS) & 1,
+                                     ones, zeros)
+    # Fewer than 64 models only fill part of the one word
+    valid = ones.copy()
+    if len(symbols) < WORD_BITS:
+        valid[:] = (1 << (1 << len(symbols))) - 1
+
+    for block in range(1 << max(len(symbols) - inner, 0)):
+        for i, name in enumerate(symbols[inner:]):
+            columns[name] = ones if block >> i & 1 else zeros
+        yield columns, {"true": ones, "false": zeros}, valid
+
+
+@functools.lru_cache(maxsize=1024)
+def compile_expression(expression):
+    """Returns a function of `m` evaluating a Python expression."""
+    return eval(f"lambda m: {expression}")
+
+
+def model_check(knowledge, query, backend="enumerate"):
+    """
+    Checks if knowledge base entails query, by enumerating every model or,
+    with backend "sat", by asking a SAT solver for a model of the
+    knowledge base where the query is false. Backend "numpy" enumerates
+    models many at a time with bitwise operations.
+    """
+    if backend == "sat":
+        return sat_entails(knowledge, query)
+    if backend == "numpy":
+        return truth_table_entails(knowledge, query)
+    if backend != "enumerate":
+        raise ValueError(f"unknown backend {backend}")
 
     # Get all symbols in both knowledge and query
-    symbols = set.union(knowledge.symbols(), query.symbols())
-
-    # Check that knowledge entails query
-    return check_all(knowledge, query, symbols, dict())
+    symbols = sorted(set.union(knowledge.symbols(), query.symbols()))
+
+    # Compile both sentences to functions of a tuple of truth values
+    knowledge_holds = knowledge.compile(symbols)
+    query_holds = query.compile(symbols)
+
+    # In every model where knowledge base is true, query must also be true
+    for model in itertools.product((True, False), repeat=len(symbols)):
+        if knowledge_holds(model) and not query_holds(model):
+            return False
+    return True
+
+
+def model_check_many(knowledge, queries, backend="enumerate"):
+    """
+    Checks each query against knowledge base, going through its models
+    once for all of them. Returns ENTAILED for each query true in every
+    model of knowledge base, REFUTED for each false in every model, and
+    UNKNOWN for the rest; if knowledge base has no models, every query is
+    entailed, as with model_check.
+    """
+    queries = list(queries)
+    # Whether each query is true, and false, in some model seen so far
+    can_be_true = [False] * len(queries)
+    can_be_false = [False] * len(queries)
+    symbols = sorted(set.union(knowledge.symbols(),
+                               *[query.symbols() for query in queries]))
+
+    def undecided():
+        return not all(t and f for t, f in zip(can_be_true, can_be_false))
+
+    if backend == "enumerate":
+        knowledge_holds = knowledge.compile(symbols)
+        query_holds = [query.compile(symbols) for query in queries]
+        for model in itertools.product((True, False), repeat=len(symbols)):
+            if knowledge_holds(model):
+                for i, holds in enumerate(query_holds):
+                    if holds(model):
+                        can_be_true[i] = True
+                    else:
+                        can_be_false[i] = True
+                if not undecided():
+                    break
+
+    elif backend == "numpy":
+        for columns, memo, valid in truth_table_blocks(symbols):
+            models = knowledge.bits(columns, memo) & valid
+            for i, query in enumerate(queries):
+                words = query.bits(columns, memo)
+                can_be_true[i] |= bool((models & words).any())
+                can_be_false[i] |= bool((models & ~words).any())
+            if not undecided():
+                break
+
+    elif backend == "sat":
+        # Each model found settles the queries true or false in it, so
+        # only queries no model has settled yet need a search of their own
+        query_holds = [query.compile(symbols) for query in queries]
+        for i, query in enumerate(queries):
+            for wanted, seen in ((False, can_be_false), (True, can_be_true)):
+                if seen[i]:
+                    continue
+                cnf = CNF()
+                cnf.add(knowledge)
+                cnf.add(query if wanted else Not(query))
+                values = Solver(cnf.count, cnf.clauses).solve()
+                if values is None:
+                    continue
+                model = tuple(bool(values[cnf.variables[name]])
+                              if name in cnf.variables else False
+                              for name in symbols)
+                for j, holds in enumerate(query_holds):
+                    if holds(model):
+                        can_be_true[j] = True
+                    else:
+                        can_be_false[j] = True
+
+    else:
+        raise ValueError(f"unknown backend {backend}")
+
+    return [ENTAILED if not f else REFUTED if not t else UNKNOWN
+            for t, f in zip(can_be_true, can_be_false)]
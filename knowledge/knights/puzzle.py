@@ -1,5 +1,10 @@
 from logic import *
 
+# Share one node between the many equal subsentences built below. An
+# interned sentence cannot be changed, so only And() made with no
+# conjuncts can be filled in later with add
+intern_sentences()
+
 AKnight = Symbol("A is a Knight")
 AKnave = Symbol("A is a Knave")
 
@@ -98,8 +103,9 @@ def main():
         if len(knowledge.conjuncts) == 0:
             print("    Not yet implemented.")
         else:
-            for symbol in symbols:
-                if model_check(knowledge, symbol):
+            answers = model_check_many(knowledge, symbols)
+            for symbol, answer in zip(symbols, answers):
+                if answer == ENTAILED:
                     print(f"    {symbol}")
 
 
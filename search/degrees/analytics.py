@@ -0,0 +1,166 @@
+"""
+Degree-of-separation analytics over the whole graph.
+
+For each source person, runs a level-synchronous BFS over the bipartite
+person-movie CSR arrays of a CompactGraph: every level expands the whole
+frontier at once with NumPy, and visited sets are boolean masks. Prints
+one JSON line per source with the number of people first reached at each
+hop, cumulative counts and the source's eccentricity, which is null when
+--max-hops stops the search before it runs out of people. Several sources
+are spread across a pool of worker processes sharing one memory-mapped
+snapshot.
+
+Usage: python analytics.py [--workers N] [--max-hops H] directory person...
+"""
+
+import argparse
+import json
+import os
+import sys
+from multiprocessing import Pool
+
+import numpy as np
+
+import degrees
+from batch import resolve_person
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        usage="python analytics.py [--workers N] [--max-hops H] "
+              "directory person..."
+    )
+    parser.add_argument("directory")
+    parser.add_argument("people", nargs="+", metavar="person",
+                        help="person id or name to measure from")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="number of worker processes")
+    parser.add_argument("--max-hops", type=int, default=None,
+                        help="stop after this many hops")
+    args = parser.parse_args()
+
+    degrees.load_data(args.directory, snapshot=True)
+    try:
+        sources = [resolve_person(person) for person in args.people]
+    except LookupError as e:
+        sys.exit(f"Person {e}")
+
+    workers = min(args.workers, len(sources))
+    if workers > 1:
+        with Pool(workers, initializer=init_worker,
+                  initargs=(args.directory,)) as pool:
+            results = pool.imap(
+                separation_profile,
+                [(source, args.max_hops) for source in sources]
+            )
+            for result in results:
+                print(json.dumps(result))
+    else:
+        for source in sources:
+            print(json.dumps(separation_profile((source, args.max_hops))))
+
+
+def init_worker(directory):
+    degrees.load_data(directory, snapshot=True)
+
+
+def separation_profile(query):
+    """
+    Returns the JSON-serializable separation profile of a (person_id,
+    max_hops) query against the loaded compact graph.
+    """
+    source, max_hops = query
+    graph = degrees.graph
+    counts, complete = hop_counts(CSRArrays(graph),
+                                  graph.person_index(source), max_hops)
+    within = np.cumsum(counts).tolist()
+    return {
+        "source": source,
+        "name": degrees.people[source]["name"],
+        "hops": counts,
+        "within": within,
+        "reachable": within[-1],
+        "eccentricity": len(counts) - 1 if complete else None,
+    }
+
+
+class CSRArrays():
+    """
+    NumPy views of a CompactGraph's adjacency arrays, sharing its memory.
+    """
+
+    def __init__(self, graph):
+        self.person_offsets = np.frombuffer(graph.person_offsets,
+                                            dtype=np.int64)
+        self.person_movies = np.frombuffer(graph.person_movies,
+                                           dtype=np.int32)
+        self.movie_offsets = np.frombuffer(graph.movie_offsets,
+                                           dtype=np.int64)
+        self.movie_people = np.frombuffer(graph.movie_people, dtype=np.int32)
+        self.num_people = len(self.person_offsets) - 1
+        self.num_movies = len(self.movie_offsets) - 1
+
+
+def hop_counts(csr, source, max_hops=None):
+    """
+    Returns (counts, complete), where entry `h` of the list `counts` is
+    the number of people exactly `h` hops from the person at index
+    `source`, ending at the last hop that reaches anyone new. `complete`
+    is False if `max_hops` stopped the search while people were still
+    being reached.
+    """
+    visited_people = np.zeros(csr.num_people, dtype=bool)
+    visited_movies = np.zeros(csr.num_movies, dtype=bool)
+    visited_people[source] = True
+    frontier = np.array([source], dtype=np.int64)
+    counts = [1]
+    while frontier.size and (max_hops is None or len(counts) <= max_hops):
+        frontier = next_level(csr, frontier, visited_people, visited_movies)
+        if frontier.size:
+            counts.append(int(frontier.size))
+    # At the hop limit, one more level tells whether anyone was left out
+    complete = not frontier.size or not next_level(
+        csr, frontier, visited_people, visited_movies
+    ).size
+    return counts, complete
+
+
+def next_level(csr, frontier, visited_people, visited_movies):
+    """
+    Returns the indexes of the people one hop from `frontier` not yet in
+    `visited_people`, and marks them and the movies used as visited.
+    """
+    # Movies of the frontier not used by an earlier level
+    movie_mask = np.zeros(csr.num_movies, dtype=bool)
+    movie_mask[gather(csr.person_offsets, csr.person_movies,
+                      frontier)] = True
+    movie_mask &= ~visited_movies
+    visited_movies |= movie_mask
+    movies = np.flatnonzero(movie_mask)
+
+    # Their stars not reached by an earlier level form the next one
+    people_mask = np.zeros(csr.num_people, dtype=bool)
+    people_mask[gather(csr.movie_offsets, csr.movie_people, movies)] = True
+    people_mask &= ~visited_people
+    visited_people |= people_mask
+    return np.flatnonzero(people_mask)
+
+
+def gather(offsets, targets, rows):
+    """
+    Returns the concatenation of CSR rows `rows`, without a Python loop.
+    """
+    starts = offsets[rows]
+    lengths = offsets[rows + 1] - starts
+    total = int(lengths.sum())
+    if total == 0:
+        return np.empty(0, dtype=targets.dtype)
+    # Position k of the output reads targets[starts[r] + (k - first[r])],
+    # where r is the row k falls in and first[r] is where that row begins
+    first = np.cumsum(lengths) - lengths
+    indexes = np.arange(total) + np.repeat(starts - first, lengths)
+    return targets[indexes]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Answers many degrees-of-separation queries at once.
+
+Reads (source, target) pairs from a query file, one per line, either as
+tab-separated values or as JSON objects with "source" and "target" keys.
+Each side may be a person id or a name. Queries are spread across a pool
+of worker processes that all memory-map the same graph snapshot, and one
+JSON result per query is written in input order. A line that cannot be
+parsed gets a result with its line number and an error instead.
+"""
+
+import argparse
+import json
+import os
+from multiprocessing import Pool
+
+import degrees
+
+CHUNK_SIZE = 16
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        usage="python batch.py [--workers N] directory queries output"
+    )
+    parser.add_argument("directory")
+    parser.add_argument("queries")
+    parser.add_argument("output")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="number of worker processes")
+    parser.add_argument("--bidirectional", action="store_true",
+                        help="search from both people at once")
+    args = parser.parse_args()
+
+    # Build the snapshot once up front so workers only ever map it
+    print("Loading data...")
+    degrees.load_data(args.directory, snapshot=True)
+    print("Data loaded.")
+
+    # Each entry is a (source, target) query or the result for a line
+    # that could not be parsed
+    entries = []
+    with open(args.queries, encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            try:
+                query = parse_query(line)
+            except ValueError as e:
+                entries.append({"line": number, "error": str(e)})
+                continue
+            if query:
+                entries.append(query)
+
+    count = 0
+    with Pool(args.workers, initializer=init_worker,
+              initargs=(args.directory,)) as pool, \
+            open(args.output, "w", encoding="utf-8") as f:
+        results = pool.imap(
+            answer_query,
+            [(*entry, args.bidirectional)
+             for entry in entries if isinstance(entry, tuple)],
+            chunksize=CHUNK_SIZE
+        )
+        for entry in entries:
+            result = next(results) if isinstance(entry, tuple) else entry
+            f.write(json.dumps(result) + "\n")
+            count += 1
+    print(f"{count} queries answered.")
+
+
+def parse_query(line):
+    """
+    Returns the (source, target) pair on a line of the query file, or
+    None if the line is blank.
+
+    Raises ValueError if the line is not a valid query.
+    """
+    line = line.strip()
+    if not line:
+        return None
+    if line.startswith("{"):
+        try:
+            query = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"invalid JSON: {e}") from None
+        if not isinstance(query, dict) or not all(
+            isinstance(query.get(key), str) for key in ("source", "target")
+        ):
+            raise ValueError("expected string \"source\" and \"target\"")
+        return query["source"], query["target"]
+    fields = line.split("\t")
+    if len(fields) != 2:
+        raise ValueError(f"expected 2 tab-separated fields, got "
+                         f"{len(fields)}")
+    source, target = fields
+    return source.strip(), target.strip()
+
+
+def init_worker(directory):
+    degrees.load_data(directory, snapshot=True)
+
+
+def answer_query(query):
+    """
+    Returns the JSON-serializable result of one (source, target,
+    bidirectional) query.
+
+    Every call runs its own search, so no state is shared between queries.
+    """
+    source, target, bidirectional = query
+    result = {"source": source, "target": target}
+    try:
+        source_id = resolve_person(source)
+        target_id = resolve_person(target)
+    except LookupError as e:
+        result["error"] = str(e)
+        return result
+
+    path = degrees.shortest_path(source_id, target_id,
+                                 bidirectional=bidirectional)
+    if path is None:
+        result["degrees"] = None
+        result["path"] = None
+    else:
+        result["degrees"] = len(path)
+        result["path"] = [[movie_id, person_id] for movie_id, person_id in path]
+    return result
+
+
+def resolve_person(value):
+    """
+    Returns the person id for `value`, which is either a person id or an
+    unambiguous name.
+
+    Raises LookupError if no single person matches.
+    """
+    if value in degrees.people:
+        return value
+    person_ids = degrees.names.get(value.lower(), set())
+    if len(person_ids) == 1:
+        return next(iter(person_ids))
+    elif person_ids:
+        raise LookupError(f"'{value}' is ambiguous: {sorted(person_ids)}")
+    raise LookupError(f"'{value}' not found")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,291 @@
+"""
+Synthetic data generator and benchmark suite for degrees.
+
+`generate` writes people.csv, movies.csv and stars.csv shaped like the
+IMDb data: small casts, and a few prolific people who star in many movies
+while most appear in only one or two. `run` times loading, name lookups
+and shortest_path queries at each path length, and prints the results,
+including people expanded and peak memory, as JSON.
+
+Usage: python benchmark.py generate [--stars N] [--seed S] directory
+       python benchmark.py run [--queries K] [--sources S] [--output FILE]
+                               directory
+"""
+
+import argparse
+import csv
+import json
+import os
+import random
+import resource
+import sys
+import time
+import tracemalloc
+from itertools import accumulate
+
+import degrees
+from landmarks import bfs_distances
+
+FIRST_NAMES = [
+    "James", "Mary", "John", "Patricia", "Robert", "Jennifer", "Michael",
+    "Linda", "William", "Elizabeth", "David", "Barbara", "Richard", "Susan",
+    "Joseph", "Jessica", "Thomas", "Sarah", "Charles", "Karen", "Kevin",
+    "Emma", "Tom", "Meryl", "Denzel", "Cate", "Keanu", "Viola", "Akira",
+    "Ingrid", "Marcello", "Sophia", "Toshiro", "Juliette", "Gael", "Priya"
+]
+LAST_NAMES = [
+    "Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller",
+    "Davis", "Rodriguez", "Martinez", "Hernandez", "Lopez", "Wilson",
+    "Anderson", "Taylor", "Moore", "Jackson", "Martin", "Lee", "Thompson",
+    "Bacon", "Hanks", "Streep", "Washington", "Blanchett", "Reeves",
+    "Kurosawa", "Bergman", "Mastroianni", "Loren", "Mifune", "Binoche"
+]
+
+# Average cast size, and the exponent of the power law that decides how
+# many movies each person stars in
+CAST_SIZE = 4
+POPULARITY_EXPONENT = 1.2
+CHUNK_SIZE = 100000
+MAX_PATH_LENGTH = 6
+
+
+def generate(directory, num_stars, seed=0):
+    """
+    Writes an IMDb-shaped dataset with about `num_stars` star rows to
+    `directory`.
+    """
+    rng = random.Random(seed)
+    num_people = max(2, num_stars // 3)
+    os.makedirs(directory, exist_ok=True)
+
+    with open(os.path.join(directory, "people.csv"), "w", newline="",
+              encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "name", "birth"])
+        for i in range(num_people):
+            name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+            birth = rng.randint(1900, 2005) if rng.random() < 0.8 else ""
+            writer.writerow([i + 1, name, birth])
+
+    # Person k is picked with weight 1 / k^POPULARITY_EXPONENT, shuffled
+    # so that popularity does not follow id order
+    ranks = list(range(num_people))
+    rng.shuffle(ranks)
+    cum_weights = list(accumulate(
+        1 / (rank + 1) ** POPULARITY_EXPONENT for rank in ranks
+    ))
+    people = range(1, num_people + 1)
+
+    def popular():
+        while True:
+            yield from rng.choices(people, cum_weights=cum_weights,
+                                   k=min(CHUNK_SIZE, num_stars))
+
+    # Everyone debuts in one movie, with the debuts spread evenly over the
+    # rows, and the other cast members are picked by popularity
+    picks = popular()
+    debuts = list(people)
+    rng.shuffle(debuts)
+    num_movies = 0
+    with open(os.path.join(directory, "stars.csv"), "w", newline="",
+              encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["person_id", "movie_id"])
+        written = 0
+        while written < num_stars or debuts:
+            cast = set()
+            for _ in range(rng.randint(1, 2 * CAST_SIZE - 1)):
+                remaining = max(1, num_stars - written - len(cast))
+                if debuts and rng.random() < len(debuts) / remaining:
+                    cast.add(debuts.pop())
+                else:
+                    cast.add(next(picks))
+            for person_id in cast:
+                writer.writerow([person_id, 1000000 + num_movies])
+            written += len(cast)
+            num_movies += 1
+
+    with open(os.path.join(directory, "movies.csv"), "w", newline="",
+              encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "title", "year"])
+        for i in range(num_movies):
+            writer.writerow([1000000 + i, f"Movie {i}",
+                             rng.randint(1920, 2024)])
+
+
+def measure(function, *args, **kwargs):
+    """
+    Returns the result of calling `function` and its wall time in
+    seconds.
+    """
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def traced_peak(function, *args, **kwargs):
+    """
+    Returns the peak memory in bytes allocated by Python while calling
+    `function`.
+    """
+    tracemalloc.start()
+    try:
+        function(*args, **kwargs)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def benchmark_loading(directory):
+    results = {}
+    snapshot_path = os.path.join(directory, "degrees.snapshot")
+    if os.path.exists(snapshot_path):
+        os.remove(snapshot_path)
+    for label, options in [("dict", {}), ("compact", {"compact": True}),
+                           ("snapshot_cold", {"snapshot": True}),
+                           ("snapshot_warm", {"snapshot": True})]:
+        _, seconds = measure(degrees.load_data, directory, **options)
+        results[label] = {"seconds": seconds}
+    results["dict"]["peak_bytes"] = traced_peak(degrees.load_data, directory)
+    results["compact"]["peak_bytes"] = traced_peak(
+        degrees.load_data, directory, compact=True
+    )
+    results["snapshot_warm"]["peak_bytes"] = traced_peak(
+        degrees.load_data, directory, snapshot=True
+    )
+    return results
+
+
+def benchmark_names(rng, queries):
+    people = list(degrees.people)
+    names = [degrees.people[rng.choice(people)]["name"]
+             for _ in range(queries)]
+    variants = {
+        "exact": names,
+        "prefix": [name[:max(1, len(name) // 2)] for name in names],
+        "fuzzy": [misspell(rng, name) for name in names]
+    }
+    results = {}
+    for label, lookups in variants.items():
+        _, seconds = measure(lambda: [degrees.find_people(name)
+                                      for name in lookups])
+        results[label] = {"queries": len(lookups),
+                          "seconds_per_query": seconds / len(lookups)}
+    return results
+
+
+def misspell(rng, name):
+    i = rng.randrange(len(name))
+    return name[:i] + name[i + 1:]
+
+
+def benchmark_paths(rng, sources):
+    """
+    Times shortest_path from `sources` random people to one person at
+    each distance from 1 up to MAX_PATH_LENGTH, in each search mode.
+    """
+    graph = degrees.graph
+    size = graph.num_people
+    targets_by_length = {}
+    for _ in range(sources):
+        # Pick someone who stars in something, as not every dataset
+        # gives everyone a credit
+        source = rng.randrange(size)
+        while not graph.movie_count(source):
+            source = rng.randrange(size)
+        distances = bfs_distances(size, source, graph.neighbors)
+        by_length = {}
+        for person in range(size):
+            distance = distances[person]
+            if 0 < distance <= MAX_PATH_LENGTH:
+                by_length.setdefault(distance, []).append(person)
+        for length, people in by_length.items():
+            targets_by_length.setdefault(length, []).append(
+                (graph.person_ids[source],
+                 graph.person_ids[rng.choice(people)])
+            )
+
+    results = {}
+    for length, pairs in sorted(targets_by_length.items()):
+        results[length] = {}
+        for mode, options in [("bfs", {}),
+                              ("bidirectional", {"bidirectional": True})]:
+            stats = {}
+            start = time.perf_counter()
+            for source, target in pairs:
+                path = degrees.shortest_path(source, target, stats=stats,
+                                             **options)
+                if path is None or len(path) != length:
+                    raise RuntimeError(
+                        f"shortest_path({source!r}, {target!r}) with "
+                        f"{mode} search did not find a path of length "
+                        f"{length}"
+                    )
+            seconds = time.perf_counter() - start
+            results[length][mode] = {
+                "queries": len(pairs),
+                "seconds_per_query": seconds / len(pairs),
+                "expanded_per_query": stats["expanded"] / len(pairs)
+            }
+    return results
+
+
+def peak_rss_bytes():
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux but in bytes on macOS
+    return usage if sys.platform == "darwin" else usage * 1024
+
+
+def run(directory, queries, sources, seed=0):
+    """
+    Returns the benchmark results for the dataset in `directory`.
+    """
+    rng = random.Random(seed)
+    results = {"directory": directory}
+    results["load"] = benchmark_loading(directory)
+    degrees.load_data(directory, snapshot=True)
+    results["people"] = len(degrees.people)
+    results["movies"] = len(degrees.movies)
+    results["names"] = benchmark_names(rng, queries)
+    results["paths"] = benchmark_paths(rng, sources)
+    results["peak_rss_bytes"] = peak_rss_bytes()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        usage="python benchmark.py {generate,run} [options] directory"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    generate_parser = commands.add_parser("generate")
+    generate_parser.add_argument("directory")
+    generate_parser.add_argument("--stars", type=int, default=10000,
+                                 help="number of star rows to write")
+    generate_parser.add_argument("--seed", type=int, default=0)
+    run_parser = commands.add_parser("run")
+    run_parser.add_argument("directory")
+    run_parser.add_argument("--queries", type=int, default=20,
+                            help="number of names to look up")
+    run_parser.add_argument("--sources", type=int, default=5,
+                            help="number of people to search paths from")
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--output", help="write JSON here, not stdout")
+    args = parser.parse_args()
+
+    if args.command == "generate":
+        generate(args.directory, args.stars, args.seed)
+        return
+
+    results = json.dumps(run(args.directory, args.queries, args.sources,
+                             args.seed),
+                         indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(results + "\n")
+    else:
+        print(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,13 @@
+import argparse
 import csv
+import math
 import sys
 
-from util import Node, StackFrontier, QueueFrontier, EmptyFrontier
+from graph import CompactGraph, MoviesView, NamesView, PeopleView, csv_stamp
+from landmarks import LandmarkIndex
+from nameindex import NameIndex
+from util import (Node, StackFrontier, QueueFrontier, PriorityFrontier,
+                  EmptyFrontier, LRUCache)
 
 # Maps names to a set of corresponding person_ids
 names = {}
@@ -12,14 +18,55 @@ people = {}
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
-explored_states = set()
-explored_actions = set()
+# CompactGraph holding the data when loaded with compact=True, in which case
+# names, people and movies are read-only views over it
+graph = None
 
+# NameIndex over everyone in people, built by load_data
+name_index = None
 
-def load_data(directory):
+# LRUCache of each person's co-stars, set by enable_neighbor_cache
+neighbor_cache = None
+
+# LandmarkIndex set by load_landmarks, which turns shortest_path into an
+# A* search guided by landmark distance bounds
+landmarks = None
+
+# graph.csv_stamp of the loaded CSV files, which a landmark index must match
+data_stamp = None
+
+
+def load_data(directory, compact=False, snapshot=False):
     """
     Load data from CSV files into memory.
+
+    If `compact` is true, stores the graph as integer-indexed CSR arrays
+    instead of dicts of sets, which takes a fraction of the memory.
+
+    If `snapshot` is true, also implies `compact` and memory-maps a binary
+    snapshot of the graph saved next to the CSV files, writing one first
+    if it is missing or the CSV files have changed since.
+
+    Landmarks loaded for earlier data are dropped, since their distances
+    do not hold for the new graph.
     """
+    global graph, names, people, movies, name_index, landmarks, data_stamp
+    landmarks = None
+    data_stamp = csv_stamp(directory)
+    if neighbor_cache is not None:
+        neighbor_cache.clear()
+    if compact or snapshot:
+        graph = CompactGraph.load(directory, snapshot=snapshot)
+        names = NamesView(graph)
+        people = PeopleView(graph)
+        movies = MoviesView(graph)
+        name_index = NameIndex.from_graph(graph)
+        return
+    elif graph is not None:
+        # Replace the read-only views of a previously loaded compact graph
+        graph = None
+        names, people, movies = {}, {}, {}
+
     # Load people
     with open(f"{directory}/people.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
@@ -54,15 +101,57 @@ def load_data(directory):
             except KeyError:
                 pass
 
+    name_index = NameIndex.from_people(people)
+
+
+def enable_neighbor_cache(maxsize=100000):
+    """
+    Keep the co-stars of the `maxsize` most recently expanded people in
+    memory, so repeated searches do not walk their movies again.
+
+    A `maxsize` of 0 turns the cache off.
+    """
+    global neighbor_cache
+    neighbor_cache = LRUCache(maxsize) if maxsize else None
+
+
+def load_landmarks(path):
+    """
+    Load a landmark index built by landmarks.py for the loaded data.
+
+    Raises ValueError if the index was built from other CSV files, or
+    from these before they last changed.
+    """
+    global landmarks
+    index = LandmarkIndex.load(path)
+    if index.stamp != data_stamp:
+        raise ValueError(f"{path} was built for different data")
+    landmarks = index
+
 
 def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+    parser = argparse.ArgumentParser(
+        usage="python degrees.py [--bidirectional] [--compact] "
+              "[--no-snapshot] [--landmarks PATH] [directory]"
+    )
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--bidirectional", action="store_true",
+                        help="search from both people at once")
+    parser.add_argument("--compact", action="store_true",
+                        help="store the graph as compact integer arrays")
+    parser.add_argument("--no-snapshot", dest="snapshot",
+                        action="store_false",
+                        help="parse the CSV files instead of using a "
+                             "cached binary snapshot")
+    parser.add_argument("--landmarks", metavar="PATH",
+                        help="guide the search with a landmark index")
+    args = parser.parse_args()
 
     # Load data from files into memory
     print("Loading data...")
-    load_data(directory)
+    load_data(args.directory, compact=args.compact, snapshot=args.snapshot)
+    if args.landmarks:
+        load_landmarks(args.landmarks)
     print("Data loaded.")
 
     source = person_id_for_name(input("Name: "))
@@ -72,7 +161,7 @@ def main():
     if target is None:
         sys.exit("Person not found.")
 
-    path = shortest_path(source, target)
+    path = shortest_path(source, target, bidirectional=args.bidirectional)
 
     if path is None:
         print("Not connected.")
@@ -87,48 +176,369 @@ def main():
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
 
-def shortest_path(source, target):
+def shortest_path(source, target, bidirectional=False, stats=None):
     """
     Returns the shortest list of (movie_id, person_id) pairs
     that connect the source to the target.
 
     If no possible path, returns None.
+
+    If `bidirectional` is true, searches from both ends at once, which
+    explores far fewer people on densely connected graphs. Otherwise, if
+    a landmark index is loaded, runs an A* search guided by it.
+
+    If `stats` is a dict, its "expanded" entry is increased by the number
+    of people whose neighbors the search looked up.
+    """
+    source, target, neighbors, to_ids = search_states(source, target)
+    if source is None:
+        return None
+    trace = find_path(source, target, neighbors, bidirectional,
+                      landmark_heuristic(target), stats)
+    return None if trace is None else to_ids(trace)
+
+
+def count_shortest_paths(source, target):
+    """
+    Returns the number of distinct shortest lists of (movie_id, person_id)
+    pairs that connect the source to the target, or 0 if there are none.
+    """
+    source, target, neighbors, _ = search_states(source, target)
+    if source is None:
+        return 0
+    parents = shortest_path_parents(source, target, neighbors)
+    if parents is None:
+        return 0
+
+    # Parents were found level by level, so each person's parents are
+    # counted before it is
+    counts = {source: 1}
+    for state, state_parents in parents.items():
+        if state != source:
+            counts[state] = sum(counts[parent] for _, parent in state_parents)
+    return counts[target]
+
+
+def all_shortest_paths(source, target):
+    """
+    Yields every shortest list of (movie_id, person_id) pairs that
+    connects the source to the target, one at a time.
+    """
+    source, target, neighbors, to_ids = search_states(source, target)
+    if source is None:
+        return
+    parents = shortest_path_parents(source, target, neighbors)
+    if parents is None:
+        return
+
+    # Depth-first walk back from the target, one parent iterator per step
+    trace = []
+    stack = [iter(parents[target])]
+    state = target
+    states = [target]
+    while stack:
+        if state == source:
+            yield to_ids(trace[::-1])
+            step = None
+        else:
+            step = next(stack[-1], None)
+        if step is None:
+            stack.pop()
+            states.pop()
+            if trace:
+                trace.pop()
+            state = states[-1] if states else None
+            continue
+        movie, parent = step
+        trace.append((movie, state))
+        states.append(parent)
+        state = parent
+        stack.append(iter(parents[parent]))
+
+
+def search_states(source, target):
+    """
+    Returns the (source, target, neighbors, to_ids) to search with for
+    two person ids: dense indexes and a converter back to ids when a
+    compact graph is loaded, or the ids themselves otherwise. Either way,
+    `neighbors` goes through the neighbor cache if it is enabled.
+
+    The source and target are None if either person is unknown.
+    """
+    if graph is None:
+        return source, target, neighbors_for_person, list
+    source = graph.person_index(source)
+    target = graph.person_index(target)
+    if source is None or target is None:
+        return None, None, None, None
+    return source, target, neighbors_for_index, graph.trace_ids
+
+
+def landmark_heuristic(target):
+    """
+    Returns an A* heuristic toward `target`, a state from search_states,
+    bounding distances with the loaded landmark index, or None if there
+    is no index.
+    """
+    if landmarks is None:
+        return None
+    if graph is not None:
+        # Landmark positions are the compact graph's indexes
+        def heuristic(person):
+            return landmarks.lower_bound(person, target)
+        return heuristic
+
+    target_position = landmarks.position(target)
+
+    def heuristic(person_id):
+        position = landmarks.position(person_id)
+        if position is None or target_position is None:
+            return 0
+        return landmarks.lower_bound(position, target_position)
+    return heuristic
+
+
+def shortest_path_parents(source, target, neighbors):
+    """
+    Searches breadth-first from the source until the level containing the
+    target is complete, and returns a dict mapping each reached state to
+    every (action, state) pair one step closer to the source, in the order
+    the states were reached. The source maps to an empty list.
+
+    Returns None if the target cannot be reached.
+    """
+    parents = {source: []}
+    depth = {source: 0}
+    frontier = [source]
+    explored_actions = set()
+    while frontier and target not in parents:
+        next_frontier = []
+        level_actions = set()
+        for state in frontier:
+            next_depth = depth[state] + 1
+            for action, n_state in neighbors(state):
+                # Actions used on an earlier level only lead to states at
+                # most as deep as this one
+                if action in explored_actions:
+                    continue
+                level_actions.add(action)
+                if n_state not in depth:
+                    depth[n_state] = next_depth
+                    parents[n_state] = []
+                    next_frontier.append(n_state)
+                if depth[n_state] == next_depth:
+                    parents[n_state].append((action, state))
+        explored_actions.update(level_actions)
+        frontier = next_frontier
+    return parents if target in parents else None
+
+
+def estimate_degrees(source, target):
+    """
+    Returns (lower, upper) bounds on the degrees of separation between
+    two people from the loaded landmark index, without searching.
+
+    The upper bound is None if no landmark connects them.
+    """
+    if landmarks is None:
+        raise ValueError("no landmark index loaded")
+    return landmarks.estimate(source, target)
+
+
+def find_path(source, target, neighbors, bidirectional=False,
+              heuristic=None, stats=None):
+    """
+    Returns the shortest list of (action, state) pairs that connect the
+    source to the target, where `neighbors(state)` returns the (action,
+    state) pairs reachable from a state.
+
+    If no possible path, returns None.
+
+    `heuristic(state)`, if given, must never overestimate the distance
+    from a state to the target.
     """
+    if stats is not None:
+        stats.setdefault("expanded", 0)
+        uncounted = neighbors
+
+        def neighbors(state):
+            stats["expanded"] += 1
+            return uncounted(state)
+
+    if bidirectional:
+        return bidirectional_search(source, target, neighbors)
+    if heuristic is not None:
+        return astar_search(source, target, neighbors, heuristic)
 
     source_node = Node(source, None, None)
     frontier = QueueFrontier()
     frontier.add(source_node)
     try:
-        target_node = bfs_search(frontier, target)
+        target_node = bfs_search(frontier, target, neighbors)
         trace = get_trace(source_node, target_node)
         return trace
     except EmptyFrontier:
         return None
-    
-
-def bfs_search(frontier, target):
-    curr_node = frontier.remove()
-    explored_states.add(curr_node.state)
-    explored_actions.add(curr_node.action)
-    if curr_node.state == target:
-        return curr_node
-    else:
-        neighbors = neighbors_for_person(curr_node.state)
-        for n in neighbors:
-            n_movie = n[0]
-            n_person = n[1]
-            if n_person not in explored_states and n_movie not in explored_actions:
+
+
+def bfs_search(frontier, target, neighbors=None):
+    """
+    Searches breadth-first from the nodes in `frontier` and returns the
+    node whose state is `target`.
+
+    Raises EmptyFrontier if the target cannot be reached.
+    """
+    if neighbors is None:
+        neighbors = neighbors_for_person
+    explored_states = set()
+    explored_actions = set()
+    while True:
+        curr_node = frontier.remove()
+        if curr_node.state == target:
+            return curr_node
+        explored_states.add(curr_node.state)
+        curr_movies = set()
+        for n_movie, n_person in neighbors(curr_node.state):
+            # Every star of an explored movie was queued the first time the
+            # movie was seen, so it can never lead to a shorter path
+            if n_movie in explored_actions:
+                continue
+            curr_movies.add(n_movie)
+            if n_person in explored_states or frontier.contains_state(n_person):
+                continue
+            n_node = Node(n_person, curr_node, n_movie)
+            if n_person == target:
+                return n_node
+            frontier.add(n_node)
+        explored_actions.update(curr_movies)
+
+
+def astar_search(source, target, neighbors, heuristic):
+    """
+    Returns the shortest list of (action, state) pairs that connect the
+    source to the target, or None if there is none, expanding states in
+    order of path length plus `heuristic(state)`.
+    """
+    source_node = Node(source, None, None)
+    frontier = PriorityFrontier()
+    frontier.add(source_node, (heuristic(source), 0))
+    costs = {source: 0}
+    explored_states = set()
+    while not frontier.empty():
+        curr_node = frontier.remove()
+        if curr_node.state == target:
+            return get_trace(source_node, curr_node)
+        # Stale entries are skipped rather than removed from the heap
+        if curr_node.state in explored_states:
+            continue
+        explored_states.add(curr_node.state)
+        cost = costs[curr_node.state] + 1
+        for n_movie, n_person in neighbors(curr_node.state):
+            if n_person in explored_states or cost >= costs.get(n_person, math.inf):
+                continue
+            estimate = heuristic(n_person)
+            if estimate == math.inf:
+                continue
+            costs[n_person] = cost
+            # Among equal estimates, prefer the deeper node
+            frontier.add(Node(n_person, curr_node, n_movie),
+                         (cost + estimate, -cost))
+    return None
+
+
+def bidirectional_search(source, target, neighbors=None):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs that connect
+    the source to the target, or None if there is none.
+
+    Grows a breadth-first tree from each end, always expanding one whole
+    level of whichever side has the smaller frontier.
+    """
+    source_node = Node(source, None, None)
+    target_node = Node(target, None, None)
+    if source == target:
+        return []
+
+    # Maps each reached person to its node in that side's search tree
+    forward = {source: source_node}
+    backward = {target: target_node}
+    forward_frontier = [source_node]
+    backward_frontier = [target_node]
+    forward_movies = set()
+    backward_movies = set()
+
+    while forward_frontier and backward_frontier:
+        if len(forward_frontier) <= len(backward_frontier):
+            forward_frontier, meeting = expand_level(
+                forward_frontier, forward, backward, forward_movies, neighbors
+            )
+            if meeting is not None:
+                forward_node, movie, backward_node = meeting
+        else:
+            backward_frontier, meeting = expand_level(
+                backward_frontier, backward, forward, backward_movies, neighbors
+            )
+            if meeting is not None:
+                backward_node, movie, forward_node = meeting
+        if meeting is not None:
+            trace = get_trace(source_node, forward_node)
+            trace.append((movie, backward_node.state))
+            while backward_node is not target_node:
+                trace.append((backward_node.action, backward_node.parent.state))
+                backward_node = backward_node.parent
+            return trace
+    return None
+
+
+def expand_level(frontier, reached, other_reached, explored_movies,
+                 neighbors):
+    """
+    Expands every node in `frontier` by one step and returns the next
+    frontier together with the best meeting found with the other side.
+
+    A meeting is a (node, movie_id, other_node) triple where `node` is on
+    this side and `other_node` was already reached by the other side. The
+    whole level is scanned so the meeting with the shortest combined
+    depth wins.
+    """
+    next_frontier = []
+    meeting = None
+    meeting_depth = None
+    level_movies = set()
+    for curr_node in frontier:
+        for n_movie, n_person in neighbors(curr_node.state):
+            if n_movie in explored_movies:
+                continue
+            level_movies.add(n_movie)
+            if n_person in other_reached:
+                other_node = other_reached[n_person]
+                depth = node_depth(other_node)
+                if meeting is None or depth < meeting_depth:
+                    meeting = (curr_node, n_movie, other_node)
+                    meeting_depth = depth
+            if n_person not in reached:
                 n_node = Node(n_person, curr_node, n_movie)
-                frontier.add(n_node)
-        return bfs_search(frontier, target)
+                reached[n_person] = n_node
+                next_frontier.append(n_node)
+    explored_movies.update(level_movies)
+    return next_frontier, meeting
+
+
+def node_depth(node):
+    depth = 0
+    while node.parent is not None:
+        node = node.parent
+        depth += 1
+    return depth
 
 
 def get_trace(source_node, target_node):
     trace = []
     curr_node = target_node
     while curr_node != source_node:
-        trace = [(curr_node.action, curr_node.state)] + trace
+        trace.append((curr_node.action, curr_node.state))
         curr_node = curr_node.parent
+    trace.reverse()
     return trace
 
 
@@ -158,17 +568,59 @@ def person_id_for_name(name):
         return person_ids[0]
 
 
+def find_people(name, by="movies", limit=10):
+    """
+    Returns up to `limit` candidate IMDB ids for a possibly partial or
+    misspelled name, most likely first, without asking for input.
+
+    Exact matches are ranked by movie count if `by` is "movies" or by
+    birth year if `by` is "birth". Otherwise falls back to people whose
+    names start with `name`, and then to similarly spelled names.
+    """
+    return name_index.resolve(name, by, limit)
+
+
 def neighbors_for_person(person_id):
     """
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
     """
+    if neighbor_cache is not None:
+        return neighbor_cache.lookup(person_id, co_stars)
+    return co_stars(person_id)
+
+
+def co_stars(person_id):
+    """
+    Returns the (movie_id, person_id) pairs of neighbors_for_person as a
+    frozenset, safe to share from the neighbor cache.
+    """
+    if graph is not None:
+        return frozenset(graph.neighbors_for_person(person_id))
     movie_ids = people[person_id]["movies"]
-    neighbors = set()
-    for movie_id in movie_ids:
-        for person_id in movies[movie_id]["stars"]:
-            neighbors.add((movie_id, person_id))
-    return neighbors
+    return frozenset(
+        (movie_id, person_id)
+        for movie_id in movie_ids
+        for person_id in movies[movie_id]["stars"]
+    )
+
+
+def neighbors_for_index(person):
+    """
+    Returns (movie, person) index pairs for people who starred with the
+    person at index `person` of the compact graph.
+    """
+    if neighbor_cache is not None:
+        return neighbor_cache.lookup(person, co_star_indexes)
+    return graph.neighbors(person)
+
+
+def co_star_indexes(person):
+    """
+    Returns the (movie, person) index pairs of a compact graph's
+    neighbors as a tuple, safe to share from the neighbor cache.
+    """
+    return tuple(graph.neighbors(person))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,523 @@
+"""
+Compact, integer-indexed storage for the people/movies graph.
+
+People and movies are numbered densely in the order they appear in their
+CSV files. Star relationships are kept twice, as person -> movies and
+movie -> people adjacency in CSR form: row `i` of an (offsets, targets)
+pair is `targets[offsets[i]:offsets[i + 1]]`.
+
+A built graph can be saved as a binary snapshot next to its CSV files and
+memory-mapped back in, which is much faster than parsing the CSVs again.
+"""
+
+import csv
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Mapping
+
+from nameindex import NameIndex
+
+
+SNAPSHOT_NAME = "degrees.snapshot"
+SNAPSHOT_MAGIC = b"DEGSNAP1"
+SNAPSHOT_VERSION = 2
+CSV_FILES = ("people.csv", "movies.csv", "stars.csv")
+
+STRING_FIELDS = ("person_ids", "person_names", "person_births",
+                 "movie_ids", "movie_titles", "movie_years", "name_trigrams")
+ARRAY_FIELDS = ("person_offsets", "person_movies",
+                "movie_offsets", "movie_people",
+                "person_order", "movie_order", "name_order",
+                "name_trigram_offsets", "name_trigram_places",
+                "name_rank_movies", "name_rank_birth")
+
+
+class StringTable():
+    """
+    Immutable sequence of strings stored as one UTF-8 blob and an array
+    of byte offsets into it.
+    """
+
+    def __init__(self, blob, offsets):
+        self.blob = blob
+        self.offsets = offsets
+
+    @classmethod
+    def from_strings(cls, strings):
+        blob = bytearray()
+        offsets = array("q", [0])
+        for s in strings:
+            blob += s.encode("utf-8")
+            offsets.append(len(blob))
+        return cls(bytes(blob), offsets)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return str(self.blob[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+
+
+class CompactGraph():
+
+    def __init__(self, person_ids, person_names, person_births,
+                 movie_ids, movie_titles, movie_years,
+                 person_offsets, person_movies,
+                 movie_offsets, movie_people,
+                 person_order, movie_order, name_order,
+                 name_trigrams, name_trigram_offsets, name_trigram_places,
+                 name_rank_movies, name_rank_birth):
+        self.person_ids = person_ids
+        self.person_names = person_names
+        self.person_births = person_births
+        self.movie_ids = movie_ids
+        self.movie_titles = movie_titles
+        self.movie_years = movie_years
+        self.person_offsets = person_offsets
+        self.person_movies = person_movies
+        self.movie_offsets = movie_offsets
+        self.movie_people = movie_people
+        # Person, movie and person indexes sorted by id, id and lowercase
+        # name respectively, for binary search lookups
+        self.person_order = person_order
+        self.movie_order = movie_order
+        self.name_order = name_order
+        # The fuzzy postings and rank trees of a NameIndex over the people
+        self.name_trigrams = name_trigrams
+        self.name_trigram_offsets = name_trigram_offsets
+        self.name_trigram_places = name_trigram_places
+        self.name_rank_movies = name_rank_movies
+        self.name_rank_birth = name_rank_birth
+
+    @classmethod
+    def from_csv(cls, directory):
+        """
+        Builds a graph from the people, movies and stars CSV files in
+        `directory`.
+        """
+        person_ids, person_names, person_births = [], [], []
+        person_index = {}
+        with open(f"{directory}/people.csv", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                person_index[row["id"]] = len(person_ids)
+                person_ids.append(row["id"])
+                person_names.append(row["name"])
+                person_births.append(row["birth"])
+
+        movie_ids, movie_titles, movie_years = [], [], []
+        movie_index = {}
+        with open(f"{directory}/movies.csv", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                movie_index[row["id"]] = len(movie_ids)
+                movie_ids.append(row["id"])
+                movie_titles.append(row["title"])
+                movie_years.append(row["year"])
+
+        star_people = array("i")
+        star_movies = array("i")
+        with open(f"{directory}/stars.csv", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                person = person_index.get(row["person_id"])
+                movie = movie_index.get(row["movie_id"])
+                if person is not None and movie is not None:
+                    star_people.append(person)
+                    star_movies.append(movie)
+
+        person_offsets, person_movies = dedupe_rows(*build_csr(
+            len(person_ids), star_people, star_movies
+        ))
+        del star_people, star_movies
+        movie_offsets, movie_people = build_csr(
+            len(movie_ids), person_movies, row_numbers(person_offsets)
+        )
+        name_order = array("i", sorted(range(len(person_ids)),
+                                       key=lambda i: person_names[i].lower()))
+        name_index = NameIndex(
+            name_order, person_names, person_ids, person_births,
+            lambda i: person_offsets[i + 1] - person_offsets[i],
+            person_index.get
+        )
+        postings = name_index.postings
+
+        return cls(
+            StringTable.from_strings(person_ids),
+            StringTable.from_strings(person_names),
+            StringTable.from_strings(person_births),
+            StringTable.from_strings(movie_ids),
+            StringTable.from_strings(movie_titles),
+            StringTable.from_strings(movie_years),
+            person_offsets, person_movies,
+            movie_offsets, movie_people,
+            array("i", sorted(range(len(person_ids)),
+                              key=person_ids.__getitem__)),
+            array("i", sorted(range(len(movie_ids)),
+                              key=movie_ids.__getitem__)),
+            name_order,
+            StringTable.from_strings(postings.trigrams),
+            postings.offsets, postings.places,
+            name_index.rank_trees["movies"], name_index.rank_trees["birth"],
+        )
+
+    @classmethod
+    def load(cls, directory, snapshot=True):
+        """
+        Returns the graph for the CSV files in `directory`.
+
+        If `snapshot` is true, memory-maps the snapshot saved next to the
+        CSVs when they are unchanged since it was written, and otherwise
+        parses the CSVs and saves a new snapshot for later runs.
+        """
+        if not snapshot:
+            return cls.from_csv(directory)
+        path = os.path.join(directory, SNAPSHOT_NAME)
+        stamp = csv_stamp(directory)
+        graph = cls.from_snapshot(path, stamp)
+        if graph is None:
+            graph = cls.from_csv(directory)
+            try:
+                graph.save_snapshot(path, stamp)
+            except OSError:
+                # A read-only data directory just means no snapshot
+                pass
+        return graph
+
+    @classmethod
+    def from_snapshot(cls, path, stamp=None):
+        """
+        Memory-maps the snapshot at `path`.
+
+        Returns None if there is no usable snapshot, or if it was written
+        for CSV files with a different `stamp`.
+        """
+        try:
+            header, sections = read_sections(path)
+        except (OSError, ValueError, KeyError, TypeError, struct.error):
+            return None
+        if (header.get("version") != SNAPSHOT_VERSION
+                or (stamp is not None and header.get("stamp") != stamp)):
+            return None
+        try:
+            fields = {
+                name: StringTable(sections[f"{name}.blob"],
+                                  sections[f"{name}.offsets"])
+                for name in STRING_FIELDS
+            }
+            fields.update((name, sections[name]) for name in ARRAY_FIELDS)
+        except KeyError:
+            return None
+        return cls(**fields)
+
+    def save_snapshot(self, path, stamp=None):
+        """
+        Writes the graph to a binary snapshot at `path`.
+        """
+        sections = {}
+        for name in STRING_FIELDS:
+            table = getattr(self, name)
+            sections[f"{name}.blob"] = table.blob
+            sections[f"{name}.offsets"] = table.offsets
+        for name in ARRAY_FIELDS:
+            sections[name] = getattr(self, name)
+        write_sections(
+            path, {"version": SNAPSHOT_VERSION, "stamp": stamp}, sections
+        )
+
+    @property
+    def num_people(self):
+        return len(self.person_offsets) - 1
+
+    @property
+    def num_movies(self):
+        return len(self.movie_offsets) - 1
+
+    def person_index(self, person_id):
+        """
+        Returns the dense index of `person_id`, or None if unknown.
+        """
+        return find(self.person_order, self.person_ids, person_id)
+
+    def movie_index(self, movie_id):
+        """
+        Returns the dense index of `movie_id`, or None if unknown.
+        """
+        return find(self.movie_order, self.movie_ids, movie_id)
+
+    def people_named(self, name):
+        """
+        Returns the indexes of all people whose lowercase name is `name`.
+        """
+        key = self.lower_name
+        lo = bisect_left(self.name_order, name, key=key)
+        hi = bisect_right(self.name_order, name, lo=lo, key=key)
+        return self.name_order[lo:hi]
+
+    def lower_name(self, person):
+        return self.person_names[person].lower()
+
+    def movie_count(self, person):
+        return self.person_offsets[person + 1] - self.person_offsets[person]
+
+    def movies_of(self, person):
+        return self.person_movies[
+            self.person_offsets[person]:self.person_offsets[person + 1]
+        ]
+
+    def stars_of(self, movie):
+        return self.movie_people[
+            self.movie_offsets[movie]:self.movie_offsets[movie + 1]
+        ]
+
+    def neighbors(self, person):
+        """
+        Returns (movie, person) index pairs for people who starred with
+        the person at index `person`.
+        """
+        person_offsets = self.person_offsets
+        movie_offsets = self.movie_offsets
+        movie_people = self.movie_people
+        neighbors = []
+        for i in range(person_offsets[person], person_offsets[person + 1]):
+            movie = self.person_movies[i]
+            for j in range(movie_offsets[movie], movie_offsets[movie + 1]):
+                neighbors.append((movie, movie_people[j]))
+        return neighbors
+
+    def neighbors_for_person(self, person_id):
+        """
+        Returns (movie_id, person_id) pairs for people who starred with
+        a given person.
+        """
+        person = self.person_index(person_id)
+        if person is None:
+            raise KeyError(person_id)
+        return {
+            (self.movie_ids[movie], self.person_ids[other])
+            for movie, other in self.neighbors(person)
+        }
+
+    def trace_ids(self, trace):
+        """
+        Converts a trace of (movie, person) indexes to one of ids.
+        """
+        return [(self.movie_ids[movie], self.person_ids[person])
+                for movie, person in trace]
+
+
+class PeopleView(Mapping):
+    """
+    Read-only `people` mapping backed by a CompactGraph.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, person_id):
+        graph = self.graph
+        person = graph.person_index(person_id)
+        if person is None:
+            raise KeyError(person_id)
+        return {
+            "name": graph.person_names[person],
+            "birth": graph.person_births[person],
+            "movies": {graph.movie_ids[m] for m in graph.movies_of(person)}
+        }
+
+    def __iter__(self):
+        return iter(self.graph.person_ids)
+
+    def __len__(self):
+        return self.graph.num_people
+
+
+class MoviesView(Mapping):
+    """
+    Read-only `movies` mapping backed by a CompactGraph.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, movie_id):
+        graph = self.graph
+        movie = graph.movie_index(movie_id)
+        if movie is None:
+            raise KeyError(movie_id)
+        return {
+            "title": graph.movie_titles[movie],
+            "year": graph.movie_years[movie],
+            "stars": {graph.person_ids[p] for p in graph.stars_of(movie)}
+        }
+
+    def __iter__(self):
+        return iter(self.graph.movie_ids)
+
+    def __len__(self):
+        return self.graph.num_movies
+
+
+class NamesView(Mapping):
+    """
+    Read-only `names` mapping backed by a CompactGraph.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, name):
+        people = self.graph.people_named(name)
+        if not people:
+            raise KeyError(name)
+        return {self.graph.person_ids[p] for p in people}
+
+    def __iter__(self):
+        graph = self.graph
+        previous = None
+        for person in graph.name_order:
+            name = graph.lower_name(person)
+            if name != previous:
+                yield name
+                previous = name
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+
+def csv_stamp(directory):
+    """
+    Returns the modification time and size of each CSV file in
+    `directory`, identifying the data a snapshot was built from.
+    """
+    stamp = {}
+    for filename in CSV_FILES:
+        stat = os.stat(os.path.join(directory, filename))
+        stamp[filename] = [stat.st_mtime_ns, stat.st_size]
+    return stamp
+
+
+def write_sections(path, header, sections):
+    """
+    Writes `header`, a JSON-serializable dict, and `sections`, a dict of
+    arrays and byte strings, to a binary file at `path`.
+
+    The file starts with a magic number and the length of a JSON header
+    recording where each section lives, followed by the raw sections,
+    each aligned to 8 bytes so they can be cast in place once mapped.
+    """
+    layout = {}
+    offset = 0
+    for name, data in sections.items():
+        typecode = memoryview(data).format
+        nbytes = len(memoryview(data).cast("B"))
+        layout[name] = [offset, nbytes, typecode]
+        offset += aligned(nbytes)
+    header = dict(header, byteorder=sys.byteorder, sections=layout)
+    encoded = json.dumps(header).encode("utf-8")
+    start = aligned(len(SNAPSHOT_MAGIC) + 8 + len(encoded))
+
+    # Write to a temporary file first so readers never see a partial file
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(SNAPSHOT_MAGIC)
+        f.write(len(encoded).to_bytes(8, "little"))
+        f.write(encoded)
+        f.write(bytes(start - f.tell()))
+        for name, data in sections.items():
+            data = memoryview(data).cast("B")
+            f.write(data)
+            f.write(bytes(aligned(len(data)) - len(data)))
+    os.replace(temp_path, path)
+
+
+def read_sections(path):
+    """
+    Memory-maps a file written by write_sections and returns its header
+    and a dict of its sections as memoryviews.
+
+    Raises ValueError if the file is not in the expected format.
+    """
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            raise ValueError(f"{path} is empty")
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(buffer)
+    magic_end = len(SNAPSHOT_MAGIC)
+    if view[:magic_end] != SNAPSHOT_MAGIC:
+        raise ValueError(f"{path} is not a snapshot")
+    length = int.from_bytes(view[magic_end:magic_end + 8], "little")
+    header = json.loads(str(view[magic_end + 8:magic_end + 8 + length],
+                            "utf-8"))
+    if header.get("byteorder") != sys.byteorder:
+        raise ValueError(f"{path} was written on another platform")
+    start = aligned(magic_end + 8 + length)
+    sections = {}
+    for name, (offset, nbytes, typecode) in header["sections"].items():
+        if (offset < 0 or nbytes < 0 or start + offset + nbytes > len(view)
+                or nbytes % struct.calcsize(typecode)):
+            raise ValueError(f"{path} is truncated or corrupt")
+        data = view[start + offset:start + offset + nbytes]
+        sections[name] = data if typecode == "B" else data.cast(typecode)
+    return header, sections
+
+
+def aligned(n):
+    return (n + 7) & ~7
+
+
+def find(order, table, value):
+    """
+    Returns the index `i` with `table[i] == value`, searching `order`, a
+    sequence of indexes into `table` sorted by their values.
+    """
+    position = bisect_left(order, value, key=table.__getitem__)
+    if position < len(order) and table[order[position]] == value:
+        return order[position]
+    return None
+
+
+def build_csr(num_rows, rows, cols):
+    """
+    Groups the (rows[k], cols[k]) pairs by row and returns the
+    (offsets, targets) arrays of the resulting CSR adjacency.
+    """
+    offsets = array("q", bytes(8 * (num_rows + 1)))
+    for row in rows:
+        offsets[row + 1] += 1
+    for i in range(num_rows):
+        offsets[i + 1] += offsets[i]
+    targets = array("i", bytes(4 * len(cols)))
+    fill = offsets[:-1]
+    for row, col in zip(rows, cols):
+        targets[fill[row]] = col
+        fill[row] += 1
+    return offsets, targets
+
+
+def dedupe_rows(offsets, targets):
+    """
+    Returns a copy of a CSR adjacency with every row sorted and free of
+    duplicate targets.
+    """
+    new_offsets = array("q", [0])
+    new_targets = array("i")
+    for i in range(len(offsets) - 1):
+        new_targets.extend(sorted(set(targets[offsets[i]:offsets[i + 1]])))
+        new_offsets.append(len(new_targets))
+    return new_offsets, new_targets
+
+
+def row_numbers(offsets):
+    """
+    Returns, for each target of a CSR adjacency, the row it belongs to.
+    """
+    rows = array("i")
+    for i in range(len(offsets) - 1):
+        rows.extend([i] * (offsets[i + 1] - offsets[i]))
+    return rows
@@ -0,0 +1,201 @@
+"""
+Landmark (ALT) distance index for the degrees graph.
+
+Stores the BFS distance from a few well-connected "landmark" people to
+every person. By the triangle inequality, |d(L, u) - d(L, t)| never
+exceeds d(u, t) for any landmark L, which gives shortest_path an
+admissible A* heuristic, and d(u, L) + d(L, t) bounds d(u, t) from above.
+
+People are identified by their position in the people CSV file, which is
+also their dense index in a CompactGraph, so the index records the
+graph.csv_stamp of the files it was built from.
+
+Usage: python landmarks.py [--count K] directory
+"""
+
+import argparse
+import heapq
+import math
+import os
+from array import array
+from collections import deque
+
+from graph import (
+    StringTable, csv_stamp, find, read_sections, write_sections
+)
+
+LANDMARKS_NAME = "degrees.landmarks"
+LANDMARKS_VERSION = 2
+DEFAULT_COUNT = 16
+
+# Distances are stored in one byte each, and longer ones are clamped to
+# CAP, which keeps lower bounds admissible
+UNREACHABLE = 255
+CAP = 254
+
+
+class LandmarkIndex():
+
+    def __init__(self, person_ids, person_order, landmarks, distances,
+                 stamp=None):
+        self.person_ids = person_ids
+        # Positions sorted by person id, for binary search lookups
+        self.person_order = person_order
+        self.landmarks = landmarks
+        # One sequence of distances per landmark, indexed by position
+        self.distances = distances
+        # csv_stamp of the data the index was built from
+        self.stamp = stamp
+
+    @classmethod
+    def build(cls, person_ids, person_order, neighbors, degree,
+              count=DEFAULT_COUNT, stamp=None):
+        """
+        Returns an index over the `count` people with the highest
+        `degree(position)`, where `neighbors(position)` returns the
+        (movie, position) pairs reachable from a position, for the data
+        with csv_stamp `stamp`.
+        """
+        size = len(person_ids)
+        landmarks = array("i", heapq.nlargest(count, range(size), key=degree))
+        distances = [bfs_distances(size, landmark, neighbors)
+                     for landmark in landmarks]
+        return cls(person_ids, person_order, landmarks, distances, stamp)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Memory-maps the index saved at `path`.
+        """
+        header, sections = read_sections(path)
+        if header.get("version") != LANDMARKS_VERSION:
+            raise ValueError(f"{path} is not a landmark index")
+        size = len(sections["person_ids.offsets"]) - 1
+        table = sections["distances"]
+        landmarks = sections["landmarks"]
+        return cls(
+            StringTable(sections["person_ids.blob"],
+                        sections["person_ids.offsets"]),
+            sections["person_order"],
+            landmarks,
+            [table[i * size:(i + 1) * size] for i in range(len(landmarks))],
+            header.get("stamp")
+        )
+
+    def save(self, path):
+        """
+        Writes the index to a binary file at `path`.
+        """
+        distances = array("B")
+        for row in self.distances:
+            distances.extend(row)
+        header = {"version": LANDMARKS_VERSION, "stamp": self.stamp}
+        write_sections(path, header, {
+            "person_ids.blob": self.person_ids.blob,
+            "person_ids.offsets": self.person_ids.offsets,
+            "person_order": array("i", self.person_order),
+            "landmarks": array("i", self.landmarks),
+            "distances": distances,
+        })
+
+    def __len__(self):
+        return len(self.person_ids)
+
+    def position(self, person_id):
+        """
+        Returns the position of `person_id`, or None if unknown.
+        """
+        return find(self.person_order, self.person_ids, person_id)
+
+    def lower_bound(self, u, t):
+        """
+        Returns a lower bound on the distance between positions `u` and
+        `t`, which is infinite if they cannot be connected.
+        """
+        bound = 0
+        for distances in self.distances:
+            du = distances[u]
+            dt = distances[t]
+            if du == UNREACHABLE or dt == UNREACHABLE:
+                # Exactly one of them reachable means separate components
+                if du != dt:
+                    return math.inf
+                continue
+            diff = du - dt if du > dt else dt - du
+            if diff > bound:
+                bound = diff
+        return bound
+
+    def upper_bound(self, u, t):
+        """
+        Returns an upper bound on the distance between positions `u` and
+        `t`, or None if no landmark connects them.
+        """
+        bound = None
+        for distances in self.distances:
+            du = distances[u]
+            dt = distances[t]
+            if du < CAP and dt < CAP and (bound is None or du + dt < bound):
+                bound = du + dt
+        return bound
+
+    def estimate(self, source_id, target_id):
+        """
+        Returns (lower, upper) bounds on the degrees of separation between
+        two people, without searching.
+        """
+        u = self.position(source_id)
+        t = self.position(target_id)
+        if u is None or t is None:
+            raise KeyError(source_id if u is None else target_id)
+        if u == t:
+            return 0, 0
+        return self.lower_bound(u, t), self.upper_bound(u, t)
+
+
+def bfs_distances(size, source, neighbors):
+    """
+    Returns the distances from position `source` to every position, with
+    UNREACHABLE for positions in other components.
+    """
+    distances = array("B", [UNREACHABLE]) * size
+    distances[source] = 0
+    queue = deque([source])
+    while queue:
+        position = queue.popleft()
+        distance = min(distances[position] + 1, CAP)
+        for _, neighbor in neighbors(position):
+            if distances[neighbor] == UNREACHABLE:
+                distances[neighbor] = distance
+                queue.append(neighbor)
+    return distances
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        usage="python landmarks.py [--count K] directory"
+    )
+    parser.add_argument("directory")
+    parser.add_argument("--count", type=int, default=DEFAULT_COUNT,
+                        help="number of landmarks")
+    args = parser.parse_args()
+
+    import degrees
+
+    print("Loading data...")
+    degrees.load_data(args.directory, snapshot=True)
+    print("Data loaded.")
+
+    graph = degrees.graph
+    index = LandmarkIndex.build(
+        graph.person_ids, graph.person_order, graph.neighbors,
+        lambda person: len(graph.movies_of(person)), args.count,
+        csv_stamp(args.directory)
+    )
+    path = os.path.join(args.directory, LANDMARKS_NAME)
+    index.save(path)
+    print(f"Saved {len(index.landmarks)} landmarks to {path}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,349 @@
+"""
+Name index for looking people up by exact, prefix or misspelled names.
+
+People are kept as positions sorted by lowercase name, so exact and
+prefix lookups are binary searches. Ranked lookups take the best few
+people from such a range of names with a tournament tree per ranking,
+without looking at the rest. Fuzzy lookups score distinct names by the
+trigrams they share with the query, probing the postings lists of only
+the query's rarest trigrams.
+
+The postings and tournament trees are built with the index, and a
+CompactGraph stores them in its snapshot.
+"""
+
+import heapq
+import math
+from array import array
+from bisect import bisect_left, bisect_right
+
+DEFAULT_LIMIT = 10
+MIN_SIMILARITY = 0.5
+
+# The orders people can be ranked in, as in NameIndex.rank
+RANK_ORDERS = ("movies", "birth")
+
+
+class NameIndex():
+
+    def __init__(self, order, names, person_ids, births, movie_count,
+                 position_of, postings=None, rank_trees=None):
+        # Positions sorted by lowercase name
+        self.order = order
+        self.names = names
+        self.person_ids = person_ids
+        self.births = births
+        self.movie_count = movie_count
+        self.position_of = position_of
+        # Postings of the distinct names, and a tournament tree over the
+        # places in `order` for each of RANK_ORDERS, built here unless
+        # given
+        if postings is None:
+            postings = Postings.build(order, self.lower_name)
+        self.postings = postings
+        if rank_trees is None:
+            rank_trees = {by: build_rank_tree(order, self.rank_key(by))
+                          for by in RANK_ORDERS}
+        self.rank_trees = rank_trees
+
+    @classmethod
+    def from_people(cls, people):
+        """
+        Builds an index over a `people` dict.
+        """
+        person_ids = list(people)
+        names = [people[person_id]["name"] for person_id in person_ids]
+        births = [people[person_id]["birth"] for person_id in person_ids]
+        counts = [len(people[person_id]["movies"]) for person_id in person_ids]
+        lower = [name.lower() for name in names]
+        order = sorted(range(len(person_ids)), key=lower.__getitem__)
+        positions = {person_id: i for i, person_id in enumerate(person_ids)}
+        return cls(order, names, person_ids, births, counts.__getitem__,
+                   positions.get)
+
+    @classmethod
+    def from_graph(cls, graph):
+        """
+        Builds an index sharing the tables of a CompactGraph.
+        """
+        return cls(
+            graph.name_order, graph.person_names, graph.person_ids,
+            graph.person_births, graph.movie_count, graph.person_index,
+            Postings(graph.name_trigrams, graph.name_trigram_offsets,
+                     graph.name_trigram_places),
+            {"movies": graph.name_rank_movies, "birth": graph.name_rank_birth}
+        )
+
+    def lower_name(self, position):
+        return self.names[position].lower()
+
+    def exact(self, name):
+        """
+        Returns the ids of everyone named `name`, ignoring case.
+        """
+        name = name.lower()
+        return [self.person_ids[position]
+                for position in self.scan(name, lambda key: key == name)]
+
+    def prefix(self, prefix, limit=DEFAULT_LIMIT):
+        """
+        Returns the ids of up to `limit` people whose names start with
+        `prefix`, ignoring case, in alphabetical order.
+        """
+        prefix = prefix.lower()
+        matches = []
+        for position in self.scan(prefix, lambda key: key.startswith(prefix)):
+            if len(matches) == limit:
+                break
+            matches.append(self.person_ids[position])
+        return matches
+
+    def scan(self, start, matches):
+        """
+        Yields positions in name order from the first name not below
+        `start` for as long as `matches(lowercase name)` holds.
+        """
+        i = bisect_left(self.order, start, key=self.lower_name)
+        while i < len(self.order):
+            position = self.order[i]
+            if not matches(self.lower_name(position)):
+                break
+            yield position
+            i += 1
+
+    def fuzzy(self, name, limit=DEFAULT_LIMIT, min_similarity=MIN_SIMILARITY):
+        """
+        Returns up to `limit` (person_id, similarity) pairs for the names
+        most similar to `name`, best first.
+
+        Similarity is the Dice coefficient of the two names' trigram sets,
+        and names below `min_similarity` are left out.
+        """
+        query = trigrams(name.lower())
+        if not query:
+            return []
+
+        # A name reaching min_similarity must share at least `needed` of
+        # the query's trigrams, so it contains one of the rarest
+        # len(query) - needed + 1 of them
+        needed = max(1, math.ceil(min_similarity * len(query)
+                                  / (2 - min_similarity)))
+        rarest = sorted(query, key=lambda t: len(self.postings.get(t, ())))
+        candidates = set()
+        for trigram in rarest[:len(query) - needed + 1]:
+            candidates.update(self.postings.get(trigram, ()))
+
+        scored = []
+        for i in candidates:
+            candidate = self.lower_name(self.order[i])
+            other = trigrams(candidate)
+            similarity = 2 * len(query & other) / (len(query) + len(other))
+            if similarity >= min_similarity:
+                scored.append((-similarity, candidate))
+        scored.sort()
+
+        matches = []
+        for similarity, candidate in scored:
+            for position in self.scan(candidate,
+                                      lambda key: key == candidate):
+                if len(matches) == limit:
+                    return matches
+                matches.append((self.person_ids[position], -similarity))
+        return matches
+
+    def rank(self, person_ids, by="movies", limit=None):
+        """
+        Returns `person_ids` ordered by how likely each is the intended
+        person: most movies first if `by` is "movies", or earliest birth
+        first if `by` is "birth", with unknown birth years last. With a
+        `limit`, returns only that many of the best.
+        """
+        key = self.rank_key(by)
+
+        def person_key(person_id):
+            return key(self.position_of(person_id))
+        if limit is None:
+            return sorted(person_ids, key=person_key)
+        return heapq.nsmallest(limit, person_ids, key=person_key)
+
+    def rank_key(self, by):
+        """
+        Returns the function giving the sort key of a position when
+        ranking by `by`, best first, with ties broken by person id.
+        """
+        if by == "movies":
+            def key(position):
+                return -self.movie_count(position), self.person_ids[position]
+        elif by == "birth":
+            def key(position):
+                birth = self.births[position]
+                return ((0, int(birth)) if birth.isdigit() else (1, 0),
+                        self.person_ids[position])
+        else:
+            raise ValueError(f"cannot rank by {by!r}")
+        return key
+
+    def rank_range(self, lo, hi, by="movies", limit=DEFAULT_LIMIT):
+        """
+        Returns the ids of up to `limit` of the people at places `lo` to
+        `hi` in name order, ranked as in rank.
+
+        Takes the best place in a range from the tournament tree, then
+        splits the range around it, so only about `limit` ranges are
+        searched however many names lie between `lo` and `hi`.
+        """
+        rank_key = self.rank_key(by)
+        tree = self.rank_trees[by]
+        order = self.order
+        size = len(order)
+        keys = {}
+
+        def key(i):
+            # The ranges share most of their tree nodes
+            if i not in keys:
+                keys[i] = rank_key(order[i])
+            return keys[i]
+
+        def best(lo, hi):
+            # The tree nodes covering lo to hi, as in a segment tree
+            nodes = []
+            lo += size
+            hi += size
+            while lo < hi:
+                if lo & 1:
+                    nodes.append(tree[lo])
+                    lo += 1
+                if hi & 1:
+                    hi -= 1
+                    nodes.append(tree[hi])
+                lo //= 2
+                hi //= 2
+            return min(nodes, key=key)
+
+        ranges = []
+
+        def push(lo, hi):
+            if lo < hi:
+                i = best(lo, hi)
+                heapq.heappush(ranges, (key(i), i, lo, hi))
+
+        push(lo, hi)
+        matches = []
+        while ranges and (limit is None or len(matches) < limit):
+            _, i, lo, hi = heapq.heappop(ranges)
+            matches.append(self.person_ids[order[i]])
+            push(lo, i)
+            push(i + 1, hi)
+        return matches
+
+    def name_range(self, name):
+        """
+        Returns the places (lo, hi) in name order of the names equal to
+        `name`, ignoring case.
+        """
+        name = name.lower()
+        lo = bisect_left(self.order, name, key=self.lower_name)
+        hi = bisect_right(self.order, name, lo=lo, key=self.lower_name)
+        return lo, hi
+
+    def prefix_range(self, prefix):
+        """
+        Returns the places (lo, hi) in name order of the names starting
+        with `prefix`, ignoring case.
+        """
+        prefix = prefix.lower()
+        lo = bisect_left(self.order, prefix, key=self.lower_name)
+        hi = bisect_right(self.order, prefix, lo=lo,
+                          key=lambda position:
+                          self.lower_name(position)[:len(prefix)])
+        return lo, hi
+
+    def resolve(self, name, by="movies", limit=DEFAULT_LIMIT):
+        """
+        Returns up to `limit` candidate ids for `name`, best first, without
+        asking the user.
+
+        Exact matches are ranked by `by`, as in rank. If there are none,
+        falls back to all names starting with `name`, ranked the same way,
+        and then to fuzzy matches, most similar first.
+        """
+        matches = self.rank_range(*self.name_range(name), by, limit)
+        if matches:
+            return matches
+        matches = self.rank_range(*self.prefix_range(name), by, limit)
+        if matches:
+            return matches
+        return [person_id for person_id, _ in self.fuzzy(name, limit)]
+
+
+class Postings():
+    """
+    Trigram postings lists in CSR form: the places in name order where
+    the distinct names containing `trigrams[i]` first appear are
+    `places[offsets[i]:offsets[i + 1]]`, with `trigrams` sorted.
+    """
+
+    def __init__(self, trigrams, offsets, places):
+        self.trigrams = trigrams
+        self.offsets = offsets
+        self.places = places
+
+    @classmethod
+    def build(cls, order, lower_name):
+        """
+        Returns the postings of the names of the positions in `order`,
+        sorted by `lower_name(position)`.
+        """
+        lists = {}
+        previous = None
+        for i, position in enumerate(order):
+            name = lower_name(position)
+            if name == previous:
+                continue
+            previous = name
+            for trigram in trigrams(name):
+                if trigram not in lists:
+                    lists[trigram] = array("i")
+                lists[trigram].append(i)
+        keys = sorted(lists)
+        offsets = array("q", [0])
+        places = array("i")
+        for trigram in keys:
+            places.extend(lists[trigram])
+            offsets.append(len(places))
+        return cls(keys, offsets, places)
+
+    def get(self, trigram, default=()):
+        """
+        Returns the places of the names containing `trigram`.
+        """
+        i = bisect_left(self.trigrams, trigram)
+        if i < len(self.trigrams) and self.trigrams[i] == trigram:
+            return self.places[self.offsets[i]:self.offsets[i + 1]]
+        return default
+
+
+def build_rank_tree(order, key):
+    """
+    Returns a tournament tree over the places in `order`: node
+    `size + i` is place i, and every other node `j` holds whichever of
+    nodes 2j and 2j + 1 has the smaller `key(order[place])`.
+    """
+    size = len(order)
+    keys = [key(position) for position in order]
+    tree = array("i", bytes(8 * size))
+    tree[size:] = array("i", range(size))
+    for node in range(size - 1, 0, -1):
+        left = tree[2 * node]
+        right = tree[2 * node + 1]
+        tree[node] = left if keys[left] < keys[right] else right
+    return tree
+
+
+def trigrams(name):
+    """
+    Returns the set of trigrams of `name`, padded so that short names and
+    word starts get trigrams of their own.
+    """
+    padded = f"  {name} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
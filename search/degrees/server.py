@@ -0,0 +1,212 @@
+"""
+Long-running degrees query server.
+
+Loads the graph once and answers requests over HTTP on localhost, each on
+its own thread with its own search state:
+
+    GET /people?name=NAME[&by=movies|birth]
+    GET /path?source=PERSON&target=PERSON[&bidirectional=1]
+    GET /stats
+
+where PERSON is a person id or an unambiguous name. Responses are JSON,
+and /stats reports request counters and latency percentiles. Missing or
+invalid parameters get a 400 response, and people who cannot be found a
+404.
+
+Usage: python server.py [--host HOST] [--port PORT] [--cache N] directory
+"""
+
+import argparse
+import json
+import threading
+import time
+import traceback
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import degrees
+from batch import resolve_person
+from nameindex import RANK_ORDERS
+
+# Number of most recent latencies kept per endpoint
+LATENCY_WINDOW = 10000
+PERCENTILES = (50, 90, 99)
+
+
+class Metrics():
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.requests = {}
+        self.errors = {}
+        self.latencies = {}
+
+    def record(self, endpoint, seconds, ok):
+        with self.lock:
+            self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+            if not ok:
+                self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+            if endpoint not in self.latencies:
+                self.latencies[endpoint] = deque(maxlen=LATENCY_WINDOW)
+            self.latencies[endpoint].append(seconds)
+
+    def summary(self):
+        with self.lock:
+            endpoints = {}
+            for endpoint, count in self.requests.items():
+                latencies = sorted(self.latencies[endpoint])
+                endpoints[endpoint] = {
+                    "requests": count,
+                    "errors": self.errors.get(endpoint, 0),
+                    "latency_ms": {
+                        f"p{p}": 1000 * percentile(latencies, p)
+                        for p in PERCENTILES
+                    }
+                }
+            return {
+                "uptime": time.time() - self.started,
+                "endpoints": endpoints
+            }
+
+
+class RequestError(Exception):
+    """
+    An error in a request, answered with HTTP status `status`.
+    """
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def percentile(values, p):
+    """
+    Returns the `p`th percentile of sorted `values` by nearest rank.
+    """
+    rank = max(1, -(-len(values) * p // 100))
+    return values[rank - 1]
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+
+    metrics = Metrics()
+
+    def do_GET(self):
+        start = time.perf_counter()
+        url = urlsplit(self.path)
+        params = {key: values[-1]
+                  for key, values in parse_qs(url.query).items()}
+        endpoint = url.path
+        handler = self.routes.get(endpoint)
+        if handler is None:
+            status, body = 404, {"error": f"unknown endpoint {endpoint}"}
+            endpoint = "unknown"
+        else:
+            try:
+                status, body = 200, handler(self, params)
+            except RequestError as e:
+                status, body = e.status, {"error": str(e)}
+            except Exception:
+                traceback.print_exc()
+                status, body = 500, {"error": "internal server error"}
+        self.send_json(status, body)
+        self.metrics.record(endpoint, time.perf_counter() - start,
+                            status == 200)
+
+    def send_json(self, status, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def people(self, params):
+        by = params.get("by", "movies")
+        if by not in RANK_ORDERS:
+            raise RequestError(
+                400, f"by must be one of {', '.join(RANK_ORDERS)}"
+            )
+        person_ids = degrees.find_people(required(params, "name"), by)
+        return [person_summary(person_id) for person_id in person_ids]
+
+    def path(self, params):
+        source = required(params, "source")
+        target = required(params, "target")
+        try:
+            source = resolve_person(source)
+            target = resolve_person(target)
+        except LookupError as e:
+            raise RequestError(404, str(e)) from None
+        bidirectional = params.get("bidirectional") in ("1", "true")
+        path = degrees.shortest_path(source, target,
+                                     bidirectional=bidirectional)
+        if path is None:
+            return {"degrees": None, "path": None}
+        steps = []
+        for movie_id, person_id in path:
+            steps.append({
+                "movie": {"id": movie_id,
+                          "title": degrees.movies[movie_id]["title"]},
+                "person": person_summary(person_id)
+            })
+        return {"degrees": len(path), "path": steps}
+
+    def stats(self, params):
+        stats = self.metrics.summary()
+        if degrees.neighbor_cache is not None:
+            stats["neighbor_cache"] = degrees.neighbor_cache.stats()
+        return stats
+
+    routes = {"/people": people, "/path": path, "/stats": stats}
+
+    def log_message(self, format, *args):
+        # Per-request logging would dominate latency; see /stats instead
+        pass
+
+
+def required(params, name):
+    """
+    Returns the value of parameter `name`, raising a 400 RequestError if
+    it is missing.
+    """
+    if name not in params:
+        raise RequestError(400, f"missing parameter {name!r}")
+    return params[name]
+
+
+def person_summary(person_id):
+    person = degrees.people[person_id]
+    return {"id": person_id, "name": person["name"], "birth": person["birth"]}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        usage="python server.py [--host HOST] [--port PORT] [--cache N] "
+              "directory"
+    )
+    parser.add_argument("directory")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--cache", type=int, default=100000,
+                        help="number of people whose co-stars are cached")
+    args = parser.parse_args()
+
+    print("Loading data...")
+    degrees.load_data(args.directory, snapshot=True)
+    degrees.enable_neighbor_cache(args.cache)
+    print("Data loaded.")
+
+    server = ThreadingHTTPServer((args.host, args.port), QueryHandler)
+    print(f"Serving on http://{args.host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,8 @@
+import heapq
+import threading
+from collections import OrderedDict, deque
+
+
 class Node():
     def __init__(self, state, parent, action):
         self.state = state
@@ -10,13 +15,17 @@ class Node():
 
 class StackFrontier():
     def __init__(self):
-        self.frontier = []
+        self.frontier = deque()
+        # Maps each state in the frontier to the number of queued nodes
+        # holding it, so membership tests and removals are O(1)
+        self.states = {}
 
     def add(self, node):
         self.frontier.append(node)
+        self.states[node.state] = self.states.get(node.state, 0) + 1
 
     def contains_state(self, state):
-        return any(node.state == state for node in self.frontier)
+        return state in self.states
 
     def empty(self):
         return len(self.frontier) == 0
@@ -25,10 +34,17 @@ class StackFrontier():
         if self.empty():
             raise EmptyFrontier("empty frontier")
         else:
-            node = self.frontier[-1]
-            self.frontier = self.frontier[:-1]
+            node = self.frontier.pop()
+            self.forget(node.state)
             return node
 
+    def forget(self, state):
+        count = self.states[state] - 1
+        if count:
+            self.states[state] = count
+        else:
+            del self.states[state]
+
 
 class QueueFrontier(StackFrontier):
 
@@ -36,8 +52,81 @@ class QueueFrontier(StackFrontier):
         if self.empty():
             raise EmptyFrontier("empty frontier")
         else:
-            node = self.frontier[0]
-            self.frontier = self.frontier[1:]
+            node = self.frontier.popleft()
+            self.forget(node.state)
+            return node
+
+
+class PriorityFrontier(StackFrontier):
+    def __init__(self):
+        super().__init__()
+        self.frontier = []
+        # Breaks ties between equal priorities in insertion order
+        self.count = 0
+
+    def add(self, node, priority):
+        heapq.heappush(self.frontier, (priority, self.count, node))
+        self.count += 1
+        self.states[node.state] = self.states.get(node.state, 0) + 1
+
+    def remove(self):
+        if self.empty():
+            raise EmptyFrontier("empty frontier")
+        else:
+            node = heapq.heappop(self.frontier)[2]
+            self.forget(node.state)
             return node
 
-class EmptyFrontier(Exception): pass
\ No newline at end of file
+
+class LRUCache():
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        # Guards entries and counters so threads can share one cache
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def lookup(self, key, compute):
+        """
+        Returns the value cached for `key`, first caching `compute(key)`
+        if there is none, and evicts the least recently used entry when
+        the cache is full.
+        """
+        with self.lock:
+            if key in self.entries:
+                self.hits += 1
+                self.entries.move_to_end(key)
+                return self.entries[key]
+            self.misses += 1
+
+        # Compute outside the lock so a slow miss does not block hits
+        value = compute(key)
+        with self.lock:
+            self.entries[key] = value
+            if len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        with self.lock:
+            return self.summary()
+
+    def summary(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+class EmptyFrontier(Exception): pass
@@ -0,0 +1,106 @@
+"""
+Background AI move search
+
+Runs a search function on a worker thread so that a game loop can keep
+drawing frames while the computer thinks. The loop starts a search, then
+polls it once per frame; it can cancel a search it no longer needs, such
+as when the player starts a new game. Only one search runs at a time,
+since a search function usually keeps its state, such as the clock and
+transposition table, on a shared game object.
+"""
+
+import threading
+import time
+
+
+class AIWorker():
+
+    def __init__(self, search):
+        """
+        `search(board, stop, progress)` returns the action to play on the
+        board. It should return early once the `stop` Event is set, and
+        may call `progress(*details)` to report how far it has got.
+        """
+        self.search = search
+        self.thread = None
+        self.stop = None
+        self.lock = threading.Lock()
+        self.action = None
+        self.error = None
+        self.progress = None
+        self.started = None
+
+    def start(self, board):
+        """
+        Starts searching for a move on `board`, cancelling any search
+        still running.
+        """
+        self.cancel()
+        self.stop = threading.Event()
+        self.action = None
+        self.error = None
+        self.progress = None
+        self.started = time.perf_counter()
+        self.thread = threading.Thread(
+            target=self.run, args=(board, self.stop), daemon=True
+        )
+        self.thread.start()
+
+    def run(self, board, stop):
+        def report(*details):
+            with self.lock:
+                if not stop.is_set():
+                    self.progress = details
+
+        try:
+            action = self.search(board, stop, report)
+            error = None
+        except Exception as e:
+            action = None
+            error = e
+        with self.lock:
+            # A cancelled search's answer is for a board no longer in play
+            if not stop.is_set():
+                self.action = action
+                self.error = error
+
+    def busy(self):
+        """
+        Returns True if a search has been started and has not finished.
+        """
+        return self.thread is not None and self.thread.is_alive()
+
+    def poll(self):
+        """
+        Returns the action found by the last search, or None if there is
+        no finished search. Each action is returned once; an exception
+        raised by the search is raised here instead.
+        """
+        if self.thread is None or self.thread.is_alive():
+            return None
+        self.thread = None
+        with self.lock:
+            action, error = self.action, self.error
+            self.action = self.error = None
+        if error is not None:
+            raise error
+        return action
+
+    def elapsed(self):
+        """
+        Returns the seconds spent on the current search.
+        """
+        return 0.0 if self.started is None else (
+            time.perf_counter() - self.started
+        )
+
+    def cancel(self):
+        """
+        Stops the current search, if any, and discards its result. Waits
+        for the search to return, so that it is finished with the game
+        before another starts.
+        """
+        if self.thread is not None:
+            self.stop.set()
+            self.thread.join()
+            self.thread = None
@@ -0,0 +1,176 @@
+"""
+Tic Tac Toe Player on bitboards
+
+A board is a pair of 9-bit integers (x, o) marking the cells taken by
+each player, where cell (i, j) is bit 3 * i + j. The functions mirror
+those in tictactoe.py, but moves are bitwise ORs and wins are table
+lookups, so searching needs no copying.
+"""
+
+from tictactoe import X, O, EMPTY
+
+FULL = 0b111111111
+WIN_MASKS = (
+    0b000000111, 0b000111000, 0b111000000,  # rows
+    0b001001001, 0b010010010, 0b100100100,  # columns
+    0b100010001, 0b001010100                # diagonals
+)
+
+# IS_WIN[bits] tells whether the cells in `bits` contain a line
+IS_WIN = tuple(
+    any(bits & mask == mask for mask in WIN_MASKS) for bits in range(1 << 9)
+)
+
+# Maps each board to its minimax value
+cache = {}
+
+
+def initial_state():
+    """
+    Returns starting state of the board.
+    """
+    return (0, 0)
+
+
+def from_board(board):
+    """
+    Returns the bitboard for a list-of-lists board.
+    """
+    x = o = 0
+    for i in range(3):
+        for j in range(3):
+            if board[i][j] == X:
+                x |= 1 << (3 * i + j)
+            elif board[i][j] == O:
+                o |= 1 << (3 * i + j)
+    return (x, o)
+
+
+def to_board(board):
+    """
+    Returns the list-of-lists board for a bitboard.
+    """
+    x, o = board
+    return [[X if x >> (3 * i + j) & 1 else O if o >> (3 * i + j) & 1
+             else EMPTY for j in range(3)]
+            for i in range(3)]
+
+
+def player(board):
+    """
+    Returns player who has the next turn on a board.
+    """
+    x, o = board
+    return X if x.bit_count() == o.bit_count() else O
+
+
+def actions(board):
+    """
+    Returns set of all possible actions (i, j) available on the board.
+    """
+    free = FULL & ~(board[0] | board[1])
+    return {divmod(cell, 3) for cell in range(9) if free >> cell & 1}
+
+
+def result(board, action):
+    """
+    Returns the board that results from making move (i, j) on the board.
+    """
+    i, j = action
+    if not (0 <= i < 3 and 0 <= j < 3):
+        raise Exception("Action is invalid!")
+    bit = 1 << (3 * i + j)
+    x, o = board
+    if (x | o) & bit:
+        raise Exception("Action is invalid!")
+    if x.bit_count() == o.bit_count():
+        return (x | bit, o)
+    return (x, o | bit)
+
+
+def winner(board):
+    """
+    Returns the winner of the game, if there is one.
+    """
+    if IS_WIN[board[0]]:
+        return X
+    if IS_WIN[board[1]]:
+        return O
+    return None
+
+
+def terminal(board):
+    """
+    Returns True if game is over, False otherwise.
+    """
+    x, o = board
+    return IS_WIN[x] or IS_WIN[o] or (x | o) == FULL
+
+
+def utility(board):
+    """
+    Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+    """
+    if IS_WIN[board[0]]:
+        return 1
+    if IS_WIN[board[1]]:
+        return -1
+    return 0
+
+
+def minimax(board):
+    """
+    Returns the optimal action for the current player on the board.
+    """
+    if terminal(board):
+        return None
+    x, o = board
+    x_to_move = x.bit_count() == o.bit_count()
+    best_action = None
+    best_value = None
+    for cell in range(9):
+        bit = 1 << cell
+        if (x | o) & bit:
+            continue
+        child = (x | bit, o) if x_to_move else (x, o | bit)
+        child_value = value(child)
+        if (best_value is None
+                or (x_to_move and child_value > best_value)
+                or (not x_to_move and child_value < best_value)):
+            best_action = divmod(cell, 3)
+            best_value = child_value
+    return best_action
+
+
+def value(board):
+    """
+    Returns the minimax value of the board: 1 if X wins with best play,
+    -1 if O does, 0 for a draw.
+    """
+    if board in cache:
+        return cache[board]
+    x, o = board
+    if IS_WIN[x]:
+        v = 1
+    elif IS_WIN[o]:
+        v = -1
+    elif (x | o) == FULL:
+        v = 0
+    else:
+        x_to_move = x.bit_count() == o.bit_count()
+        taken = x | o
+        v = -2 if x_to_move else 2
+        for cell in range(9):
+            bit = 1 << cell
+            if taken & bit:
+                continue
+            if x_to_move:
+                v = max(v, value((x | bit, o)))
+                if v == 1:
+                    break
+            else:
+                v = min(v, value((x, o | bit)))
+                if v == -1:
+                    break
+    cache[board] = v
+    return v
@@ -0,0 +1,223 @@
+"""
+Monte Carlo tree search player for m,n,k-games
+
+An anytime alternative to minimax: instead of searching every move to a
+fixed depth, each playout walks down a tree of the moves tried so far,
+choosing by the UCT rule, adds one new move, and finishes the game with
+random moves. The move played most often from the root is the answer.
+It works on any mnk.Game, tic-tac-toe included, and can be stopped after
+a number of playouts or an amount of time.
+
+Usage: python mcts.py [--playouts N] [--time SECONDS] [--seed S] m n k
+"""
+
+import argparse
+import math
+import random
+import time
+
+from mnk import DEFAULT_TIME_LIMIT, Game, self_play
+
+# Exploration constant of UCT: higher tries neglected moves more often
+EXPLORATION = math.sqrt(2)
+
+# How often, in playouts, the search checks the clock and `stop`
+CLOCK_INTERVAL = 16
+
+
+class Node():
+
+    __slots__ = ("move", "parent", "children", "untried", "visits",
+                 "reward", "winner")
+
+    def __init__(self, move, parent, untried, winner):
+        self.move = move
+        self.parent = parent
+        self.children = []
+        self.untried = untried
+        self.visits = 0
+        # Total reward for the player who made `move`: 1 per win and 0.5
+        # per draw
+        self.reward = 0.0
+        # Digit of the player who won by making `move`, 0 for a draw, or
+        # None if the game goes on
+        self.winner = winner
+
+    def select(self, log_visits):
+        """
+        Returns the child with the highest upper confidence bound.
+        """
+        return max(self.children, key=lambda child: (
+            child.reward / child.visits
+            + EXPLORATION * math.sqrt(log_visits / child.visits)
+        ))
+
+
+class MCTS():
+
+    def __init__(self, game=None, seed=None):
+        self.game = game or Game()
+        self.random = random.Random(seed)
+        self.last_search = None
+
+    def search(self, board, playouts=None, time_limit=DEFAULT_TIME_LIMIT,
+               stop=None, progress=None):
+        """
+        Returns the best action for the current player on the board found
+        in `playouts` playouts or `time_limit` seconds, whichever comes
+        first. Either limit may be None, but not both.
+
+        `stop` is an optional Event that ends the search early when set,
+        and `progress(playouts, action, visits)`, if given, is called with
+        the most visited action now and then. If the search is stopped
+        before its first playout, the first move in mnk.Game's move order
+        is returned.
+        """
+        if playouts is None and time_limit is None and stop is None:
+            raise ValueError("Search needs a playout or time limit")
+        game = self.game
+        if game.terminal(board):
+            return None
+        root_cells = game.cells(board)
+        color = 1 if root_cells.count(1) == root_cells.count(2) else 2
+        root = Node(None, None, self.moves(root_cells), None)
+        start = time.perf_counter()
+        deadline = None if time_limit is None else start + time_limit
+
+        count = 0
+        while playouts is None or count < playouts:
+            if count % CLOCK_INTERVAL == 0:
+                if ((deadline is not None and time.perf_counter() > deadline)
+                        or (stop is not None and stop.is_set())):
+                    break
+                if progress is not None and count:
+                    best = self.best_child(root)
+                    progress(count, divmod(best.move, game.n), best.visits)
+            self.playout(root, root_cells[:], color)
+            count += 1
+
+        seconds = time.perf_counter() - start
+        if root.children:
+            best = self.best_child(root)
+            move = best.move
+            visits = best.visits
+            win_rate = best.reward / best.visits
+        else:
+            # Stopped before any playout, so fall back on the move ordering
+            move = game.ordered_moves(root_cells, None)[0]
+            visits = 0
+            win_rate = None
+        self.last_search = {
+            "playouts": count,
+            "seconds": seconds,
+            "playouts_per_second": count / seconds if seconds else None,
+            "visits": visits,
+            "win_rate": win_rate
+        }
+        return divmod(move, game.n)
+
+    def playout(self, root, cells, color):
+        """
+        Runs one playout from `root`, whose board is `cells` with `color`
+        to move, and updates the statistics along its path.
+        """
+        game = self.game
+        node = root
+
+        # Select: follow UCT down through fully expanded nodes
+        while not node.untried and node.children and node.winner is None:
+            node = node.select(math.log(node.visits))
+            cells[node.move] = color
+            color = 3 - color
+
+        # Expand: add one untried move
+        if node.untried and node.winner is None:
+            move = node.untried.pop()
+            cells[move] = color
+            if game.completes_line(cells, move):
+                winner = color
+            elif 0 not in cells:
+                winner = 0
+            else:
+                winner = None
+            child = Node(move, node, [] if winner is not None
+                         else self.moves(cells), winner)
+            node.children.append(child)
+            node = child
+            color = 3 - color
+
+        # Simulate: play random moves to the end of the game
+        mover = 3 - color
+        winner = node.winner
+        if winner is None:
+            empty = [cell for cell in range(game.size) if not cells[cell]]
+            self.random.shuffle(empty)
+            winner = 0
+            for move in empty:
+                cells[move] = color
+                if game.completes_line(cells, move):
+                    winner = color
+                    break
+                color = 3 - color
+
+        # Backpropagate: credit each node to the player who moved into it
+        while node is not None:
+            node.visits += 1
+            if winner == 0:
+                node.reward += 0.5
+            elif winner == mover:
+                node.reward += 1
+            mover = 3 - mover
+            node = node.parent
+
+    def moves(self, cells):
+        """
+        Returns the empty cells in a random order, to be tried from the
+        end.
+        """
+        moves = [cell for cell in range(self.game.size) if not cells[cell]]
+        self.random.shuffle(moves)
+        return moves
+
+    def best_child(self, root):
+        """
+        Returns the most visited child, preferring moves nearer the center
+        on ties.
+        """
+        preference = self.game.preference
+        return max(root.children, key=lambda child: (
+            child.visits, -preference[child.move]
+        ))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        usage="python mcts.py [--playouts N] [--time SECONDS] [--seed S] "
+              "m n k"
+    )
+    parser.add_argument("m", type=int)
+    parser.add_argument("n", type=int)
+    parser.add_argument("k", type=int)
+    parser.add_argument("--playouts", type=int,
+                        help="number of playouts per move")
+    parser.add_argument("--time", type=float, default=DEFAULT_TIME_LIMIT,
+                        help="seconds to think per move")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    player = MCTS(Game(args.m, args.n, args.k), args.seed)
+
+    def describe():
+        stats = player.last_search
+        if stats["win_rate"] is None:
+            return "no playouts"
+        return (f"{stats['playouts']} playouts, "
+                f"{stats['playouts_per_second']:,.0f} playouts/s, "
+                f"win rate {stats['win_rate']:.2f}")
+
+    self_play(player.game,
+              lambda board: player.search(board, args.playouts, args.time),
+              describe)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,456 @@
+"""
+m,n,k-game player
+
+Generalizes tictactoe.py to an m-row, n-column board where the first
+player to get k marks in a row, column or diagonal wins: tic-tac-toe is
+the 3,3,3-game and gomoku the 15,15,5-game. Boards are lists of lists of
+X, O and EMPTY, and the functions mirror those in tictactoe.py.
+
+Boards past 3x3 are too big to search exhaustively, so minimax runs
+negamax with alpha-beta pruning under iterative deepening: it searches
+one ply deeper at a time until the time budget runs out, and answers with
+the best move of the deepest search that finished. Positions at the depth
+limit are scored by counting the lines each player could still complete.
+
+Usage: python mnk.py [--time SECONDS] [--depth D] m n k
+"""
+
+import argparse
+import time
+
+from tictactoe import X, O, EMPTY
+from transposition import (
+    EXACT, LOWER, UPPER, TranspositionTable, grid_symmetries
+)
+
+DIGITS = {EMPTY: 0, X: 1, O: 2}
+MARKS = (EMPTY, X, O)
+
+# Scores of won games, which exceed any heuristic score. A win is worth
+# one less for each move it takes, so the search prefers quick wins and
+# slow losses.
+WIN = 10 ** 12
+WIN_THRESHOLD = WIN // 2
+
+DEFAULT_TIME_LIMIT = 1.0
+CACHE_SIZE = 1000000
+
+# Boards with more cells than this only consider moves near the marks
+# already played, and do not share table entries between symmetric boards
+SMALL_BOARD = 25
+NEIGHBORHOOD = 2
+
+# How often, in nodes, the search checks the clock on small boards. Nodes
+# on large boards are slow enough to check it at every one.
+CLOCK_INTERVAL = 256
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+class Game():
+
+    def __init__(self, m=3, n=3, k=3, cache_size=CACHE_SIZE):
+        if not (0 < k <= max(m, n)):
+            raise ValueError(f"Cannot get {k} in a row on a {m}x{n} board")
+        self.m = m
+        self.n = n
+        self.k = k
+        self.size = m * n
+        self.small = self.size <= SMALL_BOARD
+        self.clock_interval = CLOCK_INTERVAL if self.small else 1
+
+        # Every run of k cells in a line, and the runs through each cell
+        self.windows = []
+        for i in range(m):
+            for j in range(n):
+                for di, dj in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                    end_i = i + (k - 1) * di
+                    end_j = j + (k - 1) * dj
+                    if 0 <= end_i < m and 0 <= end_j < n:
+                        self.windows.append(tuple(
+                            (i + s * di) * n + (j + s * dj) for s in range(k)
+                        ))
+        self.windows_through = [[] for _ in range(self.size)]
+        for window in self.windows:
+            for cell in window:
+                self.windows_through[cell].append(window)
+
+        # Score of a window holding c marks of one player and none of the
+        # other: each extra mark makes it much more threatening
+        self.weights = [0] + [10 ** c for c in range(1, k + 1)]
+
+        # Cells around each cell, and the order moves are tried in when
+        # nothing else tells them apart: nearest the center first
+        self.nearby = [self.neighborhood(cell, NEIGHBORHOOD)
+                       for cell in range(self.size)]
+        self.adjacent = [self.neighborhood(cell, 1)
+                         for cell in range(self.size)]
+        center_i = (m - 1) / 2
+        center_j = (n - 1) / 2
+        ranked = sorted(range(self.size), key=lambda cell: (
+            max(abs(cell // n - center_i), abs(cell % n - center_j)), cell
+        ))
+        self.preference = [0] * self.size
+        for rank, cell in enumerate(ranked):
+            self.preference[cell] = rank
+
+        symmetries = grid_symmetries(m, n) if self.small else None
+        self.cache = TranspositionTable(cache_size, symmetries)
+        self.nodes = 0
+        self.deadline = None
+        self.stop = None
+        self.last_search = None
+
+    def neighborhood(self, cell, radius):
+        i, j = divmod(cell, self.n)
+        return tuple(
+            a * self.n + b
+            for a in range(max(0, i - radius), min(self.m, i + radius + 1))
+            for b in range(max(0, j - radius), min(self.n, j + radius + 1))
+            if (a, b) != (i, j)
+        )
+
+    def initial_state(self):
+        """
+        Returns starting state of the board.
+        """
+        return [[EMPTY] * self.n for _ in range(self.m)]
+
+    def player(self, board):
+        """
+        Returns player who has the next turn on a board.
+        """
+        count_x = sum(row.count(X) for row in board)
+        count_o = sum(row.count(O) for row in board)
+        return X if count_x == count_o else O
+
+    def actions(self, board):
+        """
+        Returns set of all possible actions (i, j) available on the board.
+        """
+        return {(i, j) for i in range(self.m) for j in range(self.n)
+                if board[i][j] == EMPTY}
+
+    def result(self, board, action):
+        """
+        Returns the board that results from making move (i, j) on the board.
+        """
+        i, j = action
+        if not (0 <= i < self.m and 0 <= j < self.n) or board[i][j] != EMPTY:
+            raise Exception("Action is invalid!")
+        result_board = [list(row) for row in board]
+        result_board[i][j] = self.player(board)
+        return result_board
+
+    def winner(self, board):
+        """
+        Returns the winner of the game, if there is one.
+        """
+        cells = self.cells(board)
+        for window in self.windows:
+            first = cells[window[0]]
+            if first and all(cells[cell] == first for cell in window):
+                return MARKS[first]
+        return None
+
+    def terminal(self, board):
+        """
+        Returns True if game is over, False otherwise.
+        """
+        return (self.winner(board) is not None
+                or all(EMPTY not in row for row in board))
+
+    def utility(self, board):
+        """
+        Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+        """
+        mark = self.winner(board)
+        return 1 if mark == X else -1 if mark == O else 0
+
+    def cells(self, board):
+        """
+        Returns the board as a flat list of digits in row-major order.
+        """
+        return [DIGITS[mark] for row in board for mark in row]
+
+    def minimax(self, board, time_limit=DEFAULT_TIME_LIMIT, max_depth=None,
+                stop=None, progress=None):
+        """
+        Returns the best action for the current player on the board found
+        within `time_limit` seconds, searching at most `max_depth` moves
+        ahead. Either limit may be None, but not both unless the board is
+        small enough to search to the end.
+
+        `stop` is an optional Event that ends the search early when set,
+        and `progress(depth, action, value)`, if given, is called after
+        each depth searched.
+
+        Of equally good moves, the one nearest the center is returned, and
+        of those the one with the lowest (i, j).
+        """
+        if self.terminal(board):
+            return None
+        cells = self.cells(board)
+        empty = cells.count(0)
+        depth_limit = empty if max_depth is None else min(max_depth, empty)
+        start = time.perf_counter()
+        self.deadline = None if time_limit is None else start + time_limit
+        self.stop = stop
+        self.nodes = 0
+
+        best_move = None
+        best_value = None
+        depth = 0
+        for depth in range(1, depth_limit + 1):
+            try:
+                move, value = self.search_root(cells, depth)
+            except SearchTimeout:
+                depth -= 1
+                break
+            best_move, best_value = move, value
+            if progress is not None:
+                progress(depth, divmod(move, self.n), value)
+            # A proven win or loss will not change with more depth
+            if abs(value) > WIN_THRESHOLD:
+                break
+        if best_move is None:
+            # Out of time before even one ply: play the likeliest move
+            best_move = self.ordered_moves(cells, None)[0]
+
+        self.last_search = {
+            "depth": depth,
+            "value": best_value,
+            "nodes": self.nodes,
+            "seconds": time.perf_counter() - start
+        }
+        return divmod(best_move, self.n)
+
+    def search_root(self, cells, depth):
+        """
+        Returns the best move and its value for the player to move,
+        searching `depth` moves ahead.
+        """
+        _, tt_move = self.cache.probe(tuple(cells), depth, exact_depth=True)
+        color = 1 if cells.count(1) == cells.count(2) else 2
+        alpha = -WIN - 1
+        beta = WIN + 1
+        best_move = None
+        best_value = -WIN - 1
+        for move in self.ordered_moves(cells, tt_move):
+            # Search moves preferred to the best so far with a window one
+            # lower, so that a tie shows up as an exact value and the
+            # preferred move wins it whichever order moves were tried in
+            lower = (best_move is not None
+                     and self.preference[move] < self.preference[best_move])
+            cells[move] = color
+            value = -self.negamax(cells, depth - 1,
+                                  -beta, -(alpha - 1 if lower else alpha),
+                                  3 - color, move)
+            cells[move] = 0
+            if value > best_value or (value == best_value and lower):
+                best_move = move
+                best_value = value
+                alpha = max(alpha, value)
+        best_value = shorten(best_value)
+        self.cache.put(tuple(cells), best_value, EXACT, depth, best_move)
+        return best_move, best_value
+
+    def move_value(self, cells, move, depth):
+        """
+        Returns the exact value of `move` for the player to move, searching
+        `depth` moves ahead: the value search_root compares it by.
+        """
+        color = 1 if cells.count(1) == cells.count(2) else 2
+        cells[move] = color
+        try:
+            return -self.negamax(cells, depth - 1, -WIN - 1, WIN + 1,
+                                 3 - color, move)
+        finally:
+            cells[move] = 0
+
+    def negamax(self, cells, depth, alpha, beta, color, last):
+        """
+        Returns the value of the board for `color`, the player to move,
+        after the other player marked cell `last`.
+        """
+        self.nodes += 1
+        if self.nodes % self.clock_interval == 0 and self.out_of_time():
+            raise SearchTimeout
+        if self.completes_line(cells, last):
+            return -WIN
+        if 0 not in cells:
+            return 0
+        if depth == 0:
+            return self.evaluate(cells, color)
+
+        key = tuple(cells)
+        value, tt_move = self.cache.probe(key, depth, alpha, beta,
+                                          exact_depth=True)
+        if value is not None:
+            return value
+
+        # The value of this board is its best move's value shortened, so
+        # search the moves with the window lengthened to match
+        original_alpha = alpha
+        original_beta = beta
+        alpha = lengthen(alpha)
+        beta = lengthen(beta)
+        best_move = None
+        best_value = -WIN - 1
+        for move in self.ordered_moves(cells, tt_move):
+            cells[move] = color
+            value = -self.negamax(cells, depth - 1, -beta, -alpha,
+                                  3 - color, move)
+            cells[move] = 0
+            if value > best_value:
+                best_move = move
+                best_value = value
+                if value > alpha:
+                    alpha = value
+                    if alpha >= beta:
+                        break
+
+        best_value = shorten(best_value)
+        if best_value <= original_alpha:
+            bound = UPPER
+        elif best_value >= original_beta:
+            bound = LOWER
+        else:
+            bound = EXACT
+        self.cache.put(key, best_value, bound, depth, best_move)
+        return best_value
+
+    def out_of_time(self):
+        """
+        Returns True if the search has been stopped or is past its
+        deadline.
+        """
+        return ((self.stop is not None and self.stop.is_set())
+                or (self.deadline is not None
+                    and time.perf_counter() > self.deadline))
+
+    def completes_line(self, cells, cell):
+        """
+        Returns True if the mark in `cell` is part of k in a row.
+        """
+        color = cells[cell]
+        return any(all(cells[c] == color for c in window)
+                   for window in self.windows_through[cell])
+
+    def evaluate(self, cells, color):
+        """
+        Returns the heuristic value of a board for `color`: the weights of
+        the windows only `color` can still complete, minus those of the
+        windows only the other player can.
+        """
+        weights = self.weights
+        score = 0
+        for window in self.windows:
+            mine = theirs = 0
+            for cell in window:
+                mark = cells[cell]
+                if mark == color:
+                    mine += 1
+                elif mark:
+                    theirs += 1
+            if not theirs:
+                score += weights[mine]
+            elif not mine:
+                score -= weights[theirs]
+        return score
+
+    def ordered_moves(self, cells, first):
+        """
+        Returns the empty cells in the order to search them: `first`, then
+        cells next to the most marks, then cells nearest the center.
+
+        On large boards only cells near a mark are returned.
+        """
+        if self.small or not any(cells):
+            candidates = [cell for cell in range(self.size) if not cells[cell]]
+        else:
+            candidates = {c for cell in range(self.size) if cells[cell]
+                          for c in self.nearby[cell] if not cells[c]}
+        adjacent = self.adjacent
+        preference = self.preference
+        moves = sorted(candidates, key=lambda cell: (
+            -sum(1 for c in adjacent[cell] if cells[c]),
+            preference[cell]
+        ))
+        if first is not None and first in candidates:
+            moves.remove(first)
+            moves.insert(0, first)
+        return moves
+
+
+def shorten(value):
+    """
+    Returns a value seen one move further from the end of the game: wins
+    and losses further away are worth less.
+    """
+    if value > WIN_THRESHOLD:
+        return value - 1
+    if value < -WIN_THRESHOLD:
+        return value + 1
+    return value
+
+
+def lengthen(value):
+    """
+    Returns a value seen one move closer to the end of the game, undoing
+    shorten.
+    """
+    if value > WIN_THRESHOLD:
+        return value + 1
+    if value < -WIN_THRESHOLD:
+        return value - 1
+    return value
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        usage="python mnk.py [--time SECONDS] [--depth D] m n k"
+    )
+    parser.add_argument("m", type=int)
+    parser.add_argument("n", type=int)
+    parser.add_argument("k", type=int)
+    parser.add_argument("--time", type=float, default=DEFAULT_TIME_LIMIT,
+                        help="seconds to think per move")
+    parser.add_argument("--depth", type=int, help="maximum search depth")
+    args = parser.parse_args()
+
+    game = Game(args.m, args.n, args.k)
+    self_play(game, lambda board: game.minimax(board, args.time, args.depth),
+              lambda: describe_search(game.last_search))
+
+
+def self_play(game, move, describe):
+    """
+    Lets the AI play itself on `game` and prints each move, where
+    `move(board)` returns the action to play and `describe()` a summary
+    of the search that chose it.
+    """
+    board = game.initial_state()
+    while not game.terminal(board):
+        mark = game.player(board)
+        action = move(board)
+        board = game.result(board, action)
+        print(f"{mark} plays {action} ({describe()})")
+    for row in board:
+        print(" ".join(mark or "." for mark in row))
+    mark = game.winner(board)
+    print(f"Game Over: {mark} wins." if mark else "Game Over: Tie.")
+
+
+def describe_search(search):
+    """
+    Returns a summary of the `last_search` stats of a minimax search.
+    """
+    return (f"depth {search['depth']}, {search['nodes']} nodes, "
+            f"{search['seconds']:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Root-parallel m,n,k-game search
+
+Splits the moves at the root across a process pool. Each worker process
+keeps its own mnk.Game, and so its own transposition table, and searches
+the moves it is given with a full window, so every root move gets an
+exact value. The best is then picked with the same tie-break as the
+serial engine, which makes the answer for a given depth match
+mnk.Game.minimax.
+
+Like the serial engine, minimax deepens one ply at a time until the time
+budget runs out, and answers with the deepest search that finished.
+
+Usage: python parallel.py [--processes P] [--time SECONDS] [--depth D]
+                          m n k
+"""
+
+import argparse
+import os
+import time
+from multiprocessing import Pool
+
+from mnk import (
+    DEFAULT_TIME_LIMIT, WIN_THRESHOLD, Game, SearchTimeout, describe_search,
+    self_play, shorten
+)
+
+# The worker process's own game and transposition table
+game = None
+
+
+def init_worker(m, n, k):
+    global game
+    game = Game(m, n, k)
+
+
+def search_move(cells, move, depth, deadline):
+    """
+    Returns (move, value, nodes searched) for a root move, where value is
+    None if the search ran past `deadline` on the wall clock.
+    """
+    if deadline is None:
+        game.deadline = None
+    else:
+        game.deadline = time.perf_counter() + (deadline - time.time())
+    game.nodes = 0
+    try:
+        value = game.move_value(cells, move, depth)
+    except SearchTimeout:
+        value = None
+    return move, value, game.nodes
+
+
+class ParallelSearch():
+
+    def __init__(self, m=3, n=3, k=3, processes=None):
+        self.game = Game(m, n, k)
+        self.processes = processes or os.cpu_count()
+        self.pool = Pool(self.processes, initializer=init_worker,
+                         initargs=(m, n, k))
+        self.last_search = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self.pool.terminate()
+        self.pool.join()
+
+    def minimax(self, board, time_limit=DEFAULT_TIME_LIMIT, max_depth=None):
+        """
+        Returns the best action for the current player on the board, like
+        mnk.Game.minimax, with the root moves searched in parallel.
+        """
+        game = self.game
+        if game.terminal(board):
+            return None
+        cells = game.cells(board)
+        empty = cells.count(0)
+        depth_limit = empty if max_depth is None else min(max_depth, empty)
+        start = time.perf_counter()
+        deadline = None if time_limit is None else time.time() + time_limit
+        moves = game.ordered_moves(cells, None)
+
+        best_move = None
+        best_value = None
+        nodes = 0
+        depth = 0
+        for depth in range(1, depth_limit + 1):
+            results = self.pool.starmap(
+                search_move,
+                [(cells, move, depth, deadline) for move in moves],
+                chunksize=1
+            )
+            nodes += sum(result[2] for result in results)
+            if any(result[1] is None for result in results):
+                depth -= 1
+                break
+            move, value = max(
+                ((move, value) for move, value, _ in results),
+                key=lambda result: (result[1], -game.preference[result[0]])
+            )
+            best_move, best_value = move, shorten(value)
+            if abs(best_value) > WIN_THRESHOLD:
+                break
+            # Search the best moves first next time, so that a timeout
+            # is more likely to leave the important ones finished
+            values = {move: value for move, value, _ in results}
+            moves.sort(key=lambda move: (-values[move],
+                                         game.preference[move]))
+        if best_move is None:
+            best_move = moves[0]
+
+        self.last_search = {
+            "depth": depth,
+            "value": best_value,
+            "nodes": nodes,
+            "seconds": time.perf_counter() - start
+        }
+        return divmod(best_move, game.n)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        usage="python parallel.py [--processes P] [--time SECONDS] "
+              "[--depth D] m n k"
+    )
+    parser.add_argument("m", type=int)
+    parser.add_argument("n", type=int)
+    parser.add_argument("k", type=int)
+    parser.add_argument("--processes", type=int, help="worker processes")
+    parser.add_argument("--time", type=float, default=DEFAULT_TIME_LIMIT,
+                        help="seconds to think per move")
+    parser.add_argument("--depth", type=int, help="maximum search depth")
+    args = parser.parse_args()
+
+    with ParallelSearch(args.m, args.n, args.k, args.processes) as search:
+        self_play(search.game,
+                  lambda board: search.minimax(board, args.time, args.depth),
+                  lambda: describe_search(search.last_search))
+
+
+if __name__ == "__main__":
+    main()
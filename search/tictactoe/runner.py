@@ -1,12 +1,39 @@
 import pygame
 import sys
 import time
+from collections import deque
 
 import tictactoe as ttt
+from aiworker import AIWorker
+from mnk import DEFAULT_TIME_LIMIT, Game
+
+# Usage: python runner.py [m n k] to play on a larger board, where the AI
+# searches for up to DEFAULT_TIME_LIMIT seconds per move
+if len(sys.argv) == 4:
+    game = Game(*(int(arg) for arg in sys.argv[1:]))
+
+    def search(board, stop, progress):
+        return game.minimax(board, DEFAULT_TIME_LIMIT, stop=stop,
+                            progress=progress)
+elif len(sys.argv) == 1:
+    game = ttt
+
+    def search(board, stop, progress):
+        return ttt.minimax(board)
+else:
+    sys.exit("Usage: python runner.py [m n k]")
+
+rows = len(game.initial_state())
+cols = len(game.initial_state()[0])
 
 pygame.init()
 size = width, height = 600, 400
 
+# Frames per second to draw at, and how long the AI waits before moving
+# so that its moves are not instantaneous
+FPS = 60
+AI_DELAY = 0.5
+
 # Colors
 black = (0, 0, 0)
 white = (255, 255, 255)
@@ -15,16 +42,26 @@ screen = pygame.display.set_mode(size)
 
 mediumFont = pygame.font.Font("OpenSans-Regular.ttf", 28)
 largeFont = pygame.font.Font("OpenSans-Regular.ttf", 40)
-moveFont = pygame.font.Font("OpenSans-Regular.ttf", 60)
+smallFont = pygame.font.Font("OpenSans-Regular.ttf", 14)
+tile_size = min(80, (height - 120) // rows, (width - 40) // cols)
+moveFont = pygame.font.Font("OpenSans-Regular.ttf", tile_size * 3 // 4)
 
 user = None
-board = ttt.initial_state()
+board = game.initial_state()
 ai_turn = False
+worker = AIWorker(search)
+
+# Frame times in milliseconds over the last second
+clock = pygame.time.Clock()
+frame_times = deque(maxlen=FPS)
 
 while True:
 
+    frame_times.append(clock.tick(FPS))
+
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
+            worker.cancel()
             sys.exit()
 
     screen.fill(black)
@@ -67,13 +104,12 @@ while True:
     else:
 
         # Draw game board
-        tile_size = 80
-        tile_origin = (width / 2 - (1.5 * tile_size),
-                       height / 2 - (1.5 * tile_size))
+        tile_origin = (width / 2 - (cols / 2 * tile_size),
+                       height / 2 - (rows / 2 * tile_size))
         tiles = []
-        for i in range(3):
+        for i in range(rows):
             row = []
-            for j in range(3):
+            for j in range(cols):
                 rect = pygame.Rect(
                     tile_origin[0] + j * tile_size,
                     tile_origin[1] + i * tile_size,
@@ -89,18 +125,20 @@ while True:
                 row.append(rect)
             tiles.append(row)
 
-        game_over = ttt.terminal(board)
-        player = ttt.player(board)
+        game_over = game.terminal(board)
+        player = game.player(board)
 
         # Show title
         if game_over:
-            winner = ttt.winner(board)
+            winner = game.winner(board)
             if winner is None:
                 title = f"Game Over: Tie."
             else:
                 title = f"Game Over: {winner} wins."
         elif user == player:
             title = f"Play as {user}"
+        elif worker.progress is not None:
+            title = f"Computer thinking... (depth {worker.progress[0]})"
         else:
             title = f"Computer thinking..."
         title = largeFont.render(title, True, white)
@@ -108,24 +146,25 @@ while True:
         titleRect.center = ((width / 2), 30)
         screen.blit(title, titleRect)
 
-        # Check for AI move
+        # Check for AI move, searching in the background so that frames
+        # keep being drawn
         if user != player and not game_over:
-            if ai_turn:
-                time.sleep(0.5)
-                move = ttt.minimax(board)
-                board = ttt.result(board, move)
-                ai_turn = False
-            else:
+            if not ai_turn:
+                worker.start(board)
                 ai_turn = True
+            elif not worker.busy() and worker.elapsed() >= AI_DELAY:
+                move = worker.poll()
+                board = game.result(board, move)
+                ai_turn = False
 
         # Check for a user move
         click, _, _ = pygame.mouse.get_pressed()
         if click == 1 and user == player and not game_over:
             mouse = pygame.mouse.get_pos()
-            for i in range(3):
-                for j in range(3):
+            for i in range(rows):
+                for j in range(cols):
                     if (board[i][j] == ttt.EMPTY and tiles[i][j].collidepoint(mouse)):
-                        board = ttt.result(board, (i, j))
+                        board = game.result(board, (i, j))
 
         if game_over:
             againButton = pygame.Rect(width / 3, height - 65, width / 3, 50)
@@ -140,7 +179,15 @@ while True:
                 if againButton.collidepoint(mouse):
                     time.sleep(0.2)
                     user = None
-                    board = ttt.initial_state()
+                    board = game.initial_state()
+                    worker.cancel()
                     ai_turn = False
 
+    # Show frame rate and the slowest frame over the last second
+    frames = smallFont.render(
+        f"{clock.get_fps():.0f} fps, slowest frame {max(frame_times)} ms",
+        True, white
+    )
+    screen.blit(frames, (10, height - 24))
+
     pygame.display.flip()
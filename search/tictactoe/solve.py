@@ -0,0 +1,60 @@
+"""
+Solves every reachable tic-tac-toe position and writes the game-value
+table that tictactoe.py loads at import.
+
+The table has one byte for each of the 3^9 boards, indexed by reading the
+cells as base-3 digits (see tictactoe.board_index). A reachable board
+stores its minimax value plus one, so 0 means O wins, 1 a draw and 2 an X
+win, and unreachable boards store UNREACHABLE.
+
+Usage: python solve.py [output]
+"""
+
+import sys
+
+import bitboard
+from tictactoe import TABLE_SIZE, UNREACHABLE, VALUES_FILE
+
+
+def bitboard_index(board):
+    """
+    Returns the table index of a bitboard.
+    """
+    x, o = board
+    index = 0
+    for cell in reversed(range(9)):
+        index = 3 * index + (1 if x >> cell & 1 else 2 if o >> cell & 1 else 0)
+    return index
+
+
+def solve():
+    """
+    Returns the game-value table as bytes.
+    """
+    table = bytearray([UNREACHABLE]) * TABLE_SIZE
+    stack = [bitboard.initial_state()]
+    while stack:
+        board = stack.pop()
+        index = bitboard_index(board)
+        if table[index] != UNREACHABLE:
+            continue
+        table[index] = bitboard.value(board) + 1
+        if not bitboard.terminal(board):
+            for action in bitboard.actions(board):
+                stack.append(bitboard.result(board, action))
+    return bytes(table)
+
+
+def main():
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python solve.py [output]")
+    path = sys.argv[1] if len(sys.argv) == 2 else VALUES_FILE
+    table = solve()
+    with open(path, "wb") as f:
+        f.write(table)
+    reachable = sum(1 for v in table if v != UNREACHABLE)
+    print(f"Wrote {reachable} positions to {path}.")
+
+
+if __name__ == "__main__":
+    main()
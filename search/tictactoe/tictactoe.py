@@ -4,15 +4,57 @@ Tic Tac Toe Player
 
 import math
 import copy
+import os
+
+from transposition import TranspositionTable, grid_symmetries
 
 X = "X"
 O = "O"
 EMPTY = None
-cache = {}
+
+# Minimax values of boards searched so far, shared between rotations and
+# reflections of the same position
+CACHE_SIZE = 100000
+cache = TranspositionTable(CACHE_SIZE, grid_symmetries(3, 3))
+
+# Game-value table written by solve.py: one byte per board, indexed by
+# board_index, holding the board's minimax value plus one
+VALUES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                           "values.bin")
+TABLE_SIZE = 3 ** 9
+UNREACHABLE = 255
+DIGITS = {EMPTY: 0, X: 1, O: 2}
+
+
+def load_values():
+    """
+    Returns the game-value table, or None if it has not been written.
+    """
+    try:
+        with open(VALUES_FILE, "rb") as f:
+            table = f.read()
+    except OSError:
+        return None
+    return table if len(table) == TABLE_SIZE else None
+
+
+values = load_values()
+
+
+def board_index(board):
+    """
+    Returns the index of the board in the game-value table, reading cell
+    (i, j) as base-3 digit 3 * i + j with EMPTY = 0, X = 1 and O = 2.
+    """
+    index = 0
+    for row in reversed(board):
+        for cell in reversed(row):
+            index = 3 * index + DIGITS[cell]
+    return index
 
 
 def get_cache_key(board):
-    return "".join(i if i is not None else "-" for i in flatten_board(board))
+    return tuple(DIGITS[i] for i in flatten_board(board))
 
 
 def initial_state():
@@ -126,6 +168,8 @@ def minimax(board):
     """
     if terminal(board):
         return None
+    elif values is not None:
+        return table_minimax(board)
     elif player(board) == X:
         curr_actions = actions(board)
         curr_actions_min_values = [min_value(result(board, i)) for i in curr_actions]
@@ -142,13 +186,30 @@ def minimax(board):
                 return i[1]
     
 
+def table_minimax(board):
+    """
+    Returns the optimal action by looking up the value of each move in
+    the game-value table instead of searching.
+    """
+    sign = 1 if player(board) == X else -1
+    best_action = None
+    best_value = None
+    for action in sorted(actions(board)):
+        action_value = sign * values[board_index(result(board, action))]
+        if best_value is None or action_value > best_value:
+            best_action = action
+            best_value = action_value
+    return best_action
+
+
 def min_value(board):
     cache_key = get_cache_key(board)
-    if cache_key in cache:
-        return cache[cache_key]
+    entry = cache.get(cache_key)
+    if entry is not None:
+        return entry[0]
     elif terminal(board):
         util = utility(board)
-        cache[cache_key] = util
+        cache.put(cache_key, util)
         return util
     else:
         v = math.inf
@@ -156,17 +217,18 @@ def min_value(board):
         for i in curr_actions:
             i_max_value = max_value(result(board, i))
             v = min(v, i_max_value)
-        cache[cache_key] = v
+        cache.put(cache_key, v)
         return v
 
 
 def max_value(board):
     cache_key = get_cache_key(board)
-    if cache_key in cache:
-        return cache[cache_key]
+    entry = cache.get(cache_key)
+    if entry is not None:
+        return entry[0]
     elif terminal(board):
         util = utility(board)
-        cache[cache_key] = util
+        cache.put(cache_key, util)
         return util
     else:
         v = -math.inf
@@ -174,7 +236,7 @@ def max_value(board):
         for i in curr_actions:
             i_min_value = min_value(result(board, i))
             v = max(v, i_min_value)
-        cache[cache_key] = v
+        cache.put(cache_key, v)
         return v
 
 
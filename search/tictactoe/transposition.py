@@ -0,0 +1,148 @@
+"""
+Bounded transposition table for game-tree search on grid boards.
+
+Positions are keyed by a tuple of cell values in row-major order, using
+0 for an empty cell. Boards that are rotations or reflections of each
+other share one entry: every key is replaced by the smallest of its
+images under the board's symmetries before it is stored or looked up.
+
+Each entry records a value, whether that value is exact or only a lower
+or upper bound (as left by alpha-beta cutoffs), the depth it was searched
+to and the best move found. When the table is full, the least recently
+used entry is evicted.
+"""
+
+from collections import OrderedDict
+
+EXACT = "exact"
+LOWER = "lower"
+UPPER = "upper"
+
+DEFAULT_MAXSIZE = 1000000
+
+
+def grid_symmetries(m, n):
+    """
+    Returns the symmetries of an m-row, n-column board as permutations of
+    its cells: `perm[k]` is the cell whose contents move to cell `k`.
+
+    Square boards have the 8 rotations and reflections of the dihedral
+    group, and other rectangles the 4 that keep their shape.
+    """
+    def cells(transform):
+        return tuple(transform(k // n, k % n) for k in range(m * n))
+
+    symmetries = [
+        cells(lambda i, j: i * n + j),
+        cells(lambda i, j: i * n + (n - 1 - j)),
+        cells(lambda i, j: (m - 1 - i) * n + j),
+        cells(lambda i, j: (m - 1 - i) * n + (n - 1 - j)),
+    ]
+    if m == n:
+        symmetries += [
+            cells(lambda i, j: j * n + i),
+            cells(lambda i, j: j * n + (n - 1 - i)),
+            cells(lambda i, j: (n - 1 - j) * n + i),
+            cells(lambda i, j: (n - 1 - j) * n + (n - 1 - i)),
+        ]
+    return symmetries
+
+
+class TranspositionTable():
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE, symmetries=None):
+        self.maxsize = maxsize
+        self.symmetries = symmetries or []
+        # Maps canonical keys to (value, bound, depth, move) entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def canonical(self, key):
+        """
+        Returns the canonical form of `key` and the symmetry mapping it
+        there, or None for the symmetry if the table has none.
+        """
+        best = key
+        best_symmetry = None
+        for symmetry in self.symmetries:
+            image = tuple(key[cell] for cell in symmetry)
+            if image < best:
+                best = image
+                best_symmetry = symmetry
+        return best, best_symmetry
+
+    def get(self, key):
+        """
+        Returns the (value, bound, depth, move) entry for `key`, with the
+        move translated back onto `key`'s board, or None if there is none.
+        """
+        key, symmetry = self.canonical(key)
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        value, bound, depth, move = entry
+        if move is not None and symmetry is not None:
+            move = symmetry[move]
+        return value, bound, depth, move
+
+    def put(self, key, value, bound=EXACT, depth=None, move=None):
+        """
+        Stores an entry for `key`, where `move` is a cell index on `key`'s
+        board and a `depth` of None means the value is from a full search.
+        """
+        key, symmetry = self.canonical(key)
+        if move is not None and symmetry is not None:
+            move = symmetry.index(move)
+        self.entries[key] = (value, bound, depth, move)
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def probe(self, key, depth=None, alpha=None, beta=None,
+              exact_depth=False):
+        """
+        Returns (value, move) for `key`, where value is None unless the
+        entry was searched at least `depth` deep and settles the search
+        window (alpha, beta); the move is still useful for ordering.
+
+        If `exact_depth` is true, entries searched deeper than `depth` are
+        not used either, so a depth-limited search returns the same value
+        whatever else the table holds.
+        """
+        entry = self.get(key)
+        if entry is None:
+            return None, None
+        value, bound, entry_depth, move = entry
+        if entry_depth is not None and (
+            depth is None or entry_depth < depth
+            or (exact_depth and entry_depth != depth)
+        ):
+            return None, move
+        if (bound == EXACT
+                or (bound == LOWER and beta is not None and value >= beta)
+                or (bound == UPPER and alpha is not None and value <= alpha)):
+            return value, move
+        return None, move
+
+    def clear(self):
+        self.entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }